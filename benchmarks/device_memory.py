@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure the memory per device of the device representations.
+
+Run from the repository root:
+
+    python benchmarks/device_memory.py
+"""
+
+import gc
+import glob
+import tracemalloc
+from xml.etree import ElementTree
+
+from pyfritzhome import Fritzhome, FritzhomeDevice, FritzhomeDeviceState
+from pyfritzhome.fritzhomedevice import create_device
+
+COPIES = 500
+
+
+def load_elements():
+    elements = []
+    for path in sorted(glob.glob("tests/responses/*/device*.xml")):
+        try:
+            dom = ElementTree.parse(path).getroot()
+        except ElementTree.ParseError:
+            continue
+        elements.extend([dom] if dom.tag in ("device", "group") else dom.findall("*"))
+    return elements
+
+
+def measure(create, elements):
+    gc.collect()
+    tracemalloc.start()
+    objects = [create(element) for element in elements]
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / len(elements)
+
+
+def main():
+    # every copy gets its own strings, like devices parsed from a response
+    elements = [
+        ElementTree.fromstring(ElementTree.tostring(element))
+        for element in load_elements()
+        for _ in range(COPIES)
+    ]
+    fritz = Fritzhome("fritz.box", "user", "password")
+    candidates = (
+        ("FritzhomeDevice", lambda element: FritzhomeDevice(fritz, element)),
+        ("specialized", lambda element: create_device(fritz, element)),
+        ("FritzhomeDeviceState", FritzhomeDeviceState.from_node),
+    )
+    for name, create in candidates:
+        print("{0:>22}: {1:8.1f} bytes/device".format(name, measure(create, elements)))
+
+
+if __name__ == "__main__":
+    main()
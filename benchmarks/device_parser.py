@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure the device parser with and without lazy decoding.
+
+The lazy device only decodes the base values of every element.
+
+Run from the repository root:
+
+    python benchmarks/device_parser.py
+"""
+
+import glob
+import timeit
+from xml.etree import ElementTree
+
+from pyfritzhome.fritzhomedevice import FritzhomeDevice
+from pyfritzhome.fritzhomelazydevice import FritzhomeLazyDevice
+
+
+def load_elements():
+    elements = []
+    for path in sorted(glob.glob("tests/responses/*/device*.xml")):
+        try:
+            dom = ElementTree.parse(path).getroot()
+        except ElementTree.ParseError:
+            continue
+        elements.extend([dom] if dom.tag in ("device", "group") else dom.findall("*"))
+    return elements
+
+
+def parse(device, elements):
+    for element in elements:
+        device._update_from_node(element)
+
+
+def main():
+    elements = load_elements()
+    number = 200
+    results = {}
+    for name, device in (
+        ("eager", FritzhomeDevice()),
+        ("lazy", FritzhomeLazyDevice()),
+    ):
+        seconds = min(
+            timeit.repeat(lambda: parse(device, elements), number=number, repeat=5)
+        )
+        results[name] = seconds / (number * len(elements))
+        print("{0:>10}: {1:8.2f} us/device".format(name, results[name] * 1e6))
+    print("   speedup: {0:8.2f}x".format(results["eager"] / results["lazy"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,30 @@
 
 from importlib.metadata import version
 
+from .asyncfritzhome import AsyncFritzhome
+from .devicestats import FritzhomeDeviceStats, FritzhomeDeviceStatsSeries
 from .errors import InvalidError, LoginError, NotLoggedInError
+from .fleet import FritzhomeFleet
 from .fritzhome import Fritzhome
 from .fritzhomedevice import FritzhomeDevice
+from .fritzhomedevicestate import FritzhomeDeviceState, FritzhomeDeviceView
+from .fritzhomelazydevice import FritzhomeLazyDevice
+from .registry import AttributeChange, ChangeSet
 
 __version__ = version(__name__)
 
 __all__ = (
+    "AsyncFritzhome",
+    "AttributeChange",
+    "ChangeSet",
     "Fritzhome",
     "FritzhomeDevice",
+    "FritzhomeDeviceState",
+    "FritzhomeDeviceStats",
+    "FritzhomeDeviceStatsSeries",
+    "FritzhomeDeviceView",
+    "FritzhomeFleet",
+    "FritzhomeLazyDevice",
     "InvalidError",
     "LoginError",
     "NotLoggedInError",
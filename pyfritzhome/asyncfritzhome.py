@@ -0,0 +1,642 @@
+"""The asyncio fritzhome handling class."""
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import time
+from xml.etree import ElementTree
+
+from requests import Response, exceptions
+
+from .devicestats import FritzhomeDeviceStats
+from .errors import LoginError
+from .fritzhome import Fritzhome
+from .fritzhomedevice import get_projection
+from .ratelimit import AsyncRateLimiter
+
+try:
+    import aiohttp  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncFritzhome(Fritzhome):
+    """Fritzhome object to communicate with the device using asyncio.
+
+    All methods talking to the Fritz!Box are coroutines. The HTTP
+    transport is provided by aiohttp, which has to be installed
+    separately (``pip install pyfritzhome[async]``).
+
+    HTTP errors are raised as ``requests.exceptions.HTTPError`` to keep
+    the error handling identical to the ``Fritzhome`` class.
+    """
+
+    def __init__(self, host, user, password, ssl_verify=True, session=None, **kwargs):
+        """Create an asyncio fritzhome object.
+
+        An existing ``aiohttp.ClientSession`` can be passed with
+        ``session``, it is not closed by ``close()`` then. All other
+        keyword arguments are passed to ``Fritzhome``. The background
+        ``keepalive_interval`` is not supported and raises TypeError, call
+        ``refresh_session()`` from a task of the event loop instead. A
+        ``rate_limiter`` has to be an ``AsyncRateLimiter``.
+        """
+        rate_limiter = kwargs.get("rate_limiter")
+        if rate_limiter is not None and not isinstance(rate_limiter, AsyncRateLimiter):
+            raise TypeError("AsyncFritzhome requires an AsyncRateLimiter")
+        if kwargs.get("keepalive_interval") is not None:
+            raise TypeError(
+                "AsyncFritzhome does not support keepalive_interval, "
+                "call refresh_session() instead"
+            )
+        super().__init__(host, user, password, ssl_verify, **kwargs)
+        self._session = session
+        self._owns_session = session is None
+        self._async_login_lock = None
+
+    async def __aenter__(self):
+        """Enter the async context."""
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the session when leaving the async context."""
+        await self.close()
+
+    def _create_session(self):
+        """Create the HTTP session lazily inside the running event loop."""
+        return None
+
+    def _get_session(self):
+        if self._session is None:
+            if aiohttp is None:
+                raise RuntimeError("aiohttp is required for AsyncFritzhome")
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, url, params=None, timeout=10):
+        """Send a request with parameters."""
+        session = self._get_session()
+        async with session.get(
+            url,
+            params=params,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            ssl=None if self._ssl_verify else False,
+        ) as rsp:
+            if rsp.status >= 400:
+                response = Response()
+                response.status_code = rsp.status
+                response.reason = rsp.reason
+                response.url = url
+                raise exceptions.HTTPError(
+                    "{0} Error: {1} for url: {2}".format(rsp.status, rsp.reason, url),
+                    response=response,
+                )
+            plain = await rsp.text()
+        return plain.strip()
+
+    async def _login_request(self, username=None, secret=None, sid=None):
+        """Send a login request with paramerters."""
+        url = self.get_prefixed_host() + "/login_sid.lua?version=2"
+        params = {}
+        if username:
+            params["username"] = username
+        if secret:
+            params["response"] = secret
+        if sid:
+            params["sid"] = sid
+
+        plain = await self._request(url, params)
+        return self._parse_login_response(plain)
+
+    async def _logout_request(self):
+        """Send a logout request."""
+        _LOGGER.debug("logout")
+        url = self.get_prefixed_host() + "/login_sid.lua"
+        params = {"security:command/logout": "1", "sid": self._sid}
+
+        await self._request(url, params)
+
+    async def _aha_request(self, cmd, ain=None, param=None, rf=str, priority=None):
+        """Send an AHA request."""
+        (url, params) = self._aha_request_params(cmd, ain, param)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire(*self._get_rate_limit(cmd, priority))
+        try:
+            plain = await self._request(url, params)
+        except exceptions.HTTPError as ex:
+            if not self._is_session_expired(ex):
+                raise
+            await self._relogin(params["sid"])
+            if not self._is_idempotent(cmd, param):
+                raise
+            (url, params) = self._aha_request_params(cmd, ain, param)
+            plain = await self._request(url, params)
+        return self._aha_response(plain, rf)
+
+    async def _relogin(self, expired_sid):
+        """Login again, concurrent callers share one login."""
+        if self._async_login_lock is None:
+            self._async_login_lock = asyncio.Lock()
+        async with self._async_login_lock:
+            if self._sid != expired_sid:
+                return
+            _LOGGER.info("session expired, login again")
+            if self._sid_cache is not None:
+                self._sid_cache.remove_sid(self._host, self._user)
+            await self.login()
+
+    async def refresh_session(self):
+        """Refresh the session ID, login again if it already expired."""
+        sid = self._sid
+        if sid is None:
+            return
+        (checked_sid, _, _) = await self._login_request(sid=sid)
+        if checked_sid != sid:
+            await self._relogin(sid)
+
+    async def execute_many(self, commands, max_workers=4, wait=False):
+        """Send several AHA requests concurrently.
+
+        commands: iterable of (cmd, ain, param) tuples
+        max_workers: maximum number of concurrent requests
+        wait: wait for all devices to finish command execution
+
+        Return the results in the order of the commands. A failed command
+        returns the raised exception instead of a result.
+        """
+        commands = list(commands)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def execute(cmd, ain, param):
+            async with semaphore:
+                return await self._aha_request(cmd, ain=ain, param=param)
+
+        results = await asyncio.gather(
+            *(execute(*command) for command in commands), return_exceptions=True
+        )
+
+        if wait:
+            ains = [ain for (_, ain, _) in commands if ain]
+            await self.wait_devices_txbusy(ains)
+        return results
+
+    async def login(self):
+        """Login and get a valid session ID."""
+        cached_sid = self._get_cached_sid()
+        if cached_sid:
+            (checked_sid, _, _) = await self._login_request(sid=cached_sid)
+            if self._accept_cached_sid(cached_sid, checked_sid):
+                return
+
+        (sid, challenge, blocktime) = await self._login_request()
+        _LOGGER.info("sid:%s, challenge:%s, blocktime:%s", sid, challenge, blocktime)
+        if sid == "0000000000000000":
+            if blocktime > 0:
+                await asyncio.sleep(blocktime)
+            secret = self._create_login_secret(challenge)
+            (sid2, challenge, blocktime) = await self._login_request(
+                username=self._user, secret=secret
+            )
+            if sid2 == "0000000000000000" and self._forget_cached_pbkdf2_hash():
+                if blocktime > 0:
+                    await asyncio.sleep(blocktime)
+                secret = self._create_login_secret(challenge)
+                (sid2, challenge, _) = await self._login_request(
+                    username=self._user, secret=secret
+                )
+            if sid2 == "0000000000000000":
+                _LOGGER.warning("login failed %s", sid2)
+                self._forget_pbkdf2_static_hashes()
+                raise LoginError(self._user)
+            self._sid = sid2
+            self._store_sid()
+
+    async def logout(self):
+        """Logout."""
+        await self._logout_request()
+        self._sid = None
+        if self._sid_cache is not None:
+            self._sid_cache.remove_sid(self._host, self._user)
+
+    # Devices
+
+    async def update_devices(self, ignore_removed=True, fields=None):
+        """Update the device, only the sections of the fields if set.
+
+        Unlike ``Fritzhome.update_devices`` there is no ``stream`` mode,
+        the device list is read completely before it is parsed.
+        """
+        _LOGGER.info("Updating Devices ...")
+        if fields is not None:
+            fields = get_projection(fields)
+        plain = await self._aha_request("getdevicelistinfos")
+        digests = None
+        if fields is None:
+            if self._is_devicelist_unchanged(plain, ignore_removed):
+                return self._get_unchanged_devices()
+            digests = self._get_device_digests(plain)
+        device_elements = self._parse_listinfo_elements(plain)
+        return self._update_devices_from_elements(
+            device_elements, ignore_removed, fields, digests
+        )
+
+    async def _get_listinfo_elements(self, entity_type):
+        """Get the DOM elements for the entity list."""
+        plain = await self._aha_request("get" + entity_type + "listinfos")
+        return self._parse_listinfo_elements(plain)
+
+    async def wait_device_txbusy(self, ain, retries=10):
+        """Wait for device to finish command execution."""
+        if not self._has_txbusy:
+            return True
+
+        for _ in range(retries):
+            if self._has_getdeviceinfos:
+                try:
+                    # getdeviceinfos was added in FritzOS 7.24
+                    plain = await self.get_device_infos(ain)
+                    dom = ElementTree.fromstring(plain)
+                except exceptions.HTTPError:
+                    _LOGGER.debug("fallback to getdevicelistinfos")
+                    self._has_getdeviceinfos = False
+
+            if not self._has_getdeviceinfos:
+                dom = await self.get_device_element(ain)
+
+            if self._is_txbusy_done(dom):
+                return True
+
+            await asyncio.sleep(0.2)
+        return False
+
+    async def wait_devices_txbusy(
+        self, ains, timeout=5.0, interval=0.2, backoff=1.5, max_interval=2.0
+    ):
+        """Wait for several devices to finish command execution."""
+        pending = set(ains)
+        deadline = time.monotonic() + timeout
+        delay = interval
+        while pending and self._has_txbusy:
+            if self._has_getdeviceinfos and len(pending) <= self._TXBUSY_FEW_DEVICES:
+                await self._check_txbusy_devices(pending)
+            else:
+                elements = await self.get_device_elements()
+                self._check_txbusy_elements(pending, elements)
+
+            if not pending or not self._has_txbusy:
+                break
+            if time.monotonic() + delay > deadline:
+                return pending
+            await asyncio.sleep(delay)
+            delay = min(delay * backoff, max_interval)
+        return set()
+
+    async def _check_txbusy_devices(self, pending):
+        """Remove the devices which are not busy anymore from pending."""
+        for ain in list(pending):
+            try:
+                # getdeviceinfos was added in FritzOS 7.24
+                dom = ElementTree.fromstring(await self.get_device_infos(ain))
+            except exceptions.HTTPError:
+                _LOGGER.debug("fallback to getdevicelistinfos")
+                self._has_getdeviceinfos = False
+                return
+            if self._is_txbusy_done(dom):
+                pending.discard(ain)
+
+    async def get_device_elements(self):
+        """Get the DOM elements for the device list."""
+        return await self._get_listinfo_elements("device")
+
+    async def get_device_element(self, ain):
+        """Get the DOM element for the specified device."""
+        return self._find_element(await self.get_device_elements(), ain)
+
+    async def get_devices(self):
+        """Get the list of all known devices."""
+        return list((await self.get_devices_as_dict()).values())
+
+    async def get_devices_as_dict(self):
+        """Get the list of all known devices."""
+        if self._devices is None:
+            await self.update_devices()
+        return self._devices
+
+    async def get_device_by_ain(self, ain):
+        """Return a device specified by the AIN."""
+        return (await self.get_devices_as_dict())[ain]
+
+    async def get_device_infos(self, ain):
+        """Get the device infos."""
+        return await self._aha_request("getdeviceinfos", ain=ain)
+
+    async def get_device_present(self, ain):
+        """Get the device presence."""
+        return await self._aha_request("getswitchpresent", ain=ain, rf=bool)
+
+    async def get_device_name(self, ain):
+        """Get the device name."""
+        return await self._aha_request("getswitchname", ain=ain)
+
+    async def get_switch_state(self, ain):
+        """Get the switch state."""
+        return await self._aha_request("getswitchstate", ain=ain, rf=bool)
+
+    async def set_switch_state_on(self, ain, wait=False):
+        """Set the switch to on state."""
+        result = await self._aha_request("setswitchon", ain=ain, rf=bool)
+        wait and await self.wait_device_txbusy(ain)
+        return result
+
+    async def set_switch_state_off(self, ain, wait=False):
+        """Set the switch to off state."""
+        result = await self._aha_request("setswitchoff", ain=ain, rf=bool)
+        wait and await self.wait_device_txbusy(ain)
+        return result
+
+    async def set_switch_state_toggle(self, ain, wait=False):
+        """Toggle the switch state."""
+        result = await self._aha_request("setswitchtoggle", ain=ain, rf=bool)
+        wait and await self.wait_device_txbusy(ain)
+        return result
+
+    async def get_switch_power(self, ain):
+        """Get the switch power consumption."""
+        return await self._aha_request("getswitchpower", ain=ain, rf=int)
+
+    async def get_switch_energy(self, ain):
+        """Get the switch energy."""
+        return await self._aha_request("getswitchenergy", ain=ain, rf=int)
+
+    async def get_temperature(self, ain):
+        """Get the device temperature sensor value."""
+        return await self._aha_request("gettemperature", ain=ain, rf=float) / 10.0
+
+    async def _get_temperature(self, ain, name):
+        plain = await self._aha_request(name, ain=ain, rf=float)
+        return plain / 2
+
+    async def get_target_temperature(self, ain):
+        """Get the thermostate target temperature."""
+        return await self._get_temperature(ain, "gethkrtsoll")
+
+    async def set_target_temperature(self, ain, temperature, wait=False):
+        """Set the thermostate target temperature."""
+        temp = self._target_temperature_param(temperature)
+
+        await self._aha_request("sethkrtsoll", ain=ain, param={"param": temp})
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_window_open(self, ain, seconds, wait=False):
+        """Set the thermostate target temperature."""
+        endtimestamp = int(time.time() + seconds)
+
+        await self._aha_request(
+            "sethkrwindowopen", ain=ain, param={"endtimestamp": endtimestamp}
+        )
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_boost_mode(self, ain, seconds, wait=False):
+        """Set the thermostate to boost mode."""
+        endtimestamp = int(time.time() + seconds)
+
+        await self._aha_request(
+            "sethkrboost", ain=ain, param={"endtimestamp": endtimestamp}
+        )
+        wait and await self.wait_device_txbusy(ain)
+
+    async def get_comfort_temperature(self, ain):
+        """Get the thermostate comfort temperature."""
+        return await self._get_temperature(ain, "gethkrkomfort")
+
+    async def get_eco_temperature(self, ain):
+        """Get the thermostate eco temperature."""
+        return await self._get_temperature(ain, "gethkrabsenk")
+
+    async def get_device_statistics(self, ain):
+        """Get device statistics."""
+        if self._stats_cache is not None:
+            return (await self._get_cached_device_stats(ain))[0]
+        return await self._aha_request("getbasicdevicestats", ain=ain)
+
+    async def get_device_stats(self, ain):
+        """Get the parsed device statistics as ``FritzhomeDeviceStats``."""
+        if self._stats_cache is not None:
+            return (await self._get_cached_device_stats(ain))[1]
+        return FritzhomeDeviceStats.from_xml(await self.get_device_statistics(ain))
+
+    async def get_all_device_statistics(self, ains=None, max_workers=4):
+        """Get the parsed statistics of several devices concurrently.
+
+        ains: AINs of the devices, all devices with temperature, humidity
+              or power meter statistics if not set
+        max_workers: maximum number of concurrent requests
+
+        Return a dictionary of the AINs and their ``FritzhomeDeviceStats``.
+        A failed device maps to the raised exception instead.
+        """
+        if ains is None:
+            ains = self._get_statistics_ains(await self.get_devices())
+        ains = list(ains)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def get_stats(ain):
+            async with semaphore:
+                return await self.get_device_stats(ain)
+
+        results = await asyncio.gather(
+            *(get_stats(ain) for ain in ains), return_exceptions=True
+        )
+        return dict(zip(ains, results))
+
+    async def _get_cached_device_stats(self, ain):
+        """Get the (plain, stats) from the cache, fetch them if expired."""
+        entry = self._stats_cache.get(ain)
+        if entry is None:
+            plain = await self._aha_request("getbasicdevicestats", ain=ain)
+            entry = self._stats_cache.set(ain, plain)
+        return entry
+
+    # Lightbulb-related commands
+
+    async def set_state_off(self, ain, wait=False):
+        """Set the switch/actuator/lightbulb to on state."""
+        await self._aha_request("setsimpleonoff", ain=ain, param={"onoff": 0})
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_state_on(self, ain, wait=False):
+        """Set the switch/actuator/lightbulb to on state."""
+        await self._aha_request("setsimpleonoff", ain=ain, param={"onoff": 1})
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_state_toggle(self, ain, wait=False):
+        """Toggle the switch/actuator/lightbulb state."""
+        await self._aha_request("setsimpleonoff", ain=ain, param={"onoff": 2})
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_level(self, ain, level, wait=False):
+        """Set level/brightness/height in interval [0,255]."""
+        if level < 0:
+            level = 0  # 0%
+        elif level > 255:
+            level = 255  # 100 %
+
+        await self._aha_request("setlevel", ain=ain, param={"level": int(level)})
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_level_percentage(self, ain, level, wait=False):
+        """Set level/brightness/height in interval [0,100]."""
+        if level < 0:
+            level = 0
+        elif level > 100:
+            level = 100
+
+        await self._aha_request(
+            "setlevelpercentage", ain=ain, param={"level": int(level)}
+        )
+        wait and await self.wait_device_txbusy(ain)
+
+    async def _get_colordefaults(self, ain):
+        plain = await self._aha_request("getcolordefaults", ain=ain)
+        return ElementTree.fromstring(plain)
+
+    async def get_colors(self, ain):
+        """Get colors (HSV-space) supported by this lightbulb."""
+        return self._parse_colors(await self._get_colordefaults(ain))
+
+    async def set_color(self, ain, hsv, duration=0, mapped=True, wait=False):
+        """Set hue and saturation.
+
+        hsv: HUE colorspace element obtained from get_colors()
+        duration: Speed of change in seconds, 0 = instant
+        """
+        params = {
+            "hue": int(hsv[0]),
+            "saturation": int(hsv[1]),
+            "duration": int(duration) * 10,
+        }
+        if mapped:
+            await self._aha_request("setcolor", ain=ain, param=params)
+        else:
+            # available since Fritz!OS 7.39
+            await self._aha_request("setunmappedcolor", ain=ain, param=params)
+        wait and await self.wait_device_txbusy(ain)
+
+    async def get_color_temps(self, ain):
+        """Get temperatures supported by this lightbulb."""
+        return self._parse_color_temps(await self._get_colordefaults(ain))
+
+    async def set_color_temp(self, ain, temperature, duration=0, wait=False):
+        """Set color temperature.
+
+        temperature: temperature element obtained from get_temperatures()
+        duration: Speed of change in seconds, 0 = instant
+        """
+        params = {"temperature": int(temperature), "duration": int(duration) * 10}
+        await self._aha_request("setcolortemperature", ain=ain, param=params)
+        wait and await self.wait_device_txbusy(ain)
+
+    # blinds
+    # states: open, close, stop
+    async def _set_blind_state(self, ain, state):
+        await self._aha_request("setblind", ain=ain, param={"target": state})
+
+    async def set_blind_open(self, ain, wait=False):
+        """Set the blind state to open."""
+        await self._set_blind_state(ain, "open")
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_blind_close(self, ain, wait=False):
+        """Set the blind state to close."""
+        await self._set_blind_state(ain, "close")
+        wait and await self.wait_device_txbusy(ain)
+
+    async def set_blind_stop(self, ain, wait=False):
+        """Set the blind state to stop."""
+        await self._set_blind_state(ain, "stop")
+        wait and await self.wait_device_txbusy(ain)
+
+    # Template-related commands
+
+    async def has_templates(self):
+        """Check if the Fritz!Box supports smarthome templates."""
+        plain = await self._aha_request("gettemplatelistinfos")
+        return self._is_xml(plain)
+
+    async def update_templates(self, ignore_removed=True):
+        """Update the template."""
+        _LOGGER.info("Updating Templates ...")
+        template_elements = await self.get_template_elements()
+        return self._update_templates_from_elements(template_elements, ignore_removed)
+
+    async def get_template_elements(self):
+        """Get the DOM elements for the template list."""
+        return await self._get_listinfo_elements("template")
+
+    async def get_templates(self):
+        """Get the list of all known templates."""
+        return list((await self.get_templates_as_dict()).values())
+
+    async def get_templates_as_dict(self):
+        """Get the list of all known templates."""
+        if self._templates is None:
+            await self.update_templates()
+        return self._templates
+
+    async def get_template_by_ain(self, ain):
+        """Return a template specified by the AIN."""
+        return (await self.get_templates_as_dict())[ain]
+
+    async def apply_template(self, ain):
+        """Appliy a template."""
+        await self._aha_request("applytemplate", ain=ain)
+
+    # Trigger-related commands
+
+    async def has_triggers(self):
+        """Check if the Fritz!Box supports smarthome triggers."""
+        plain = await self._aha_request("gettriggerlistinfos")
+        return self._is_xml(plain)
+
+    async def update_triggers(self, ignore_removed=True):
+        """Update the triger."""
+        _LOGGER.info("Updating Trigers ...")
+        trigger_elements = await self.get_trigger_elements()
+        return self._update_triggers_from_elements(trigger_elements, ignore_removed)
+
+    async def get_trigger_elements(self):
+        """Get the DOM elements for the trigger list."""
+        return await self._get_listinfo_elements("trigger")
+
+    async def get_triggers(self):
+        """Get the list of all known triggers."""
+        return list((await self.get_triggers_as_dict()).values())
+
+    async def get_triggers_as_dict(self):
+        """Get all known triggers as dictionary."""
+        if self._triggers is None:
+            await self.update_triggers()
+        return self._triggers
+
+    async def get_trigger_by_ain(self, ain):
+        """Return a trigger specified by the AIN."""
+        return (await self.get_triggers_as_dict())[ain]
+
+    async def _set_trigger_state(self, ain, state):
+        await self._aha_request("settriggeractive", ain=ain, param={"active": state})
+
+    async def set_trigger_active(self, ain):
+        """Set the trigger to active state."""
+        await self._set_trigger_state(ain, "1")
+
+    async def set_trigger_inactive(self, ain):
+        """Set the trigger to inactive state."""
+        await self._set_trigger_state(ain, "0")
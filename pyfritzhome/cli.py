@@ -6,13 +6,30 @@ from __future__ import print_function
 import logging
 import argparse
 
-from pyfritzhome import Fritzhome, __version__
+from pyfritzhome import Fritzhome, __version__, tracing
+from pyfritzhome.sessioncache import SessionCache
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def list_fields(fritz, fields):
+    """Print the base information and the fields of all devices."""
+    fritz.update_devices(fields=fields)
+    for device in fritz.get_devices():
+        print("#" * 30)
+        print("name=%s" % device.name)
+        print("  ain=%s" % device.ain)
+        print("  present=%s" % device.present)
+        for field in fields:
+            print("  %s=%s" % (field, getattr(device, field, None)))
+
+
 def list_all(fritz, args):
     """Command that prints all device information."""
+    if args.fields:
+        list_fields(fritz, args.fields.split(","))
+        return
+
     devices = fritz.get_devices()
 
     for device in devices:
@@ -89,8 +106,18 @@ def device_presence(fritz, args):
 
 def device_statistics(fritz, args):
     """Command that prints the device statistics."""
-    stats = fritz.get_device_statistics(args.ain)
-    print(stats)
+    stats = fritz.get_device_stats(args.ain)
+    for category in stats.get_categories():
+        for series in stats.get_series(category):
+            print(
+                "%s grid=%s datatime=%s values=%s"
+                % (
+                    category,
+                    series.grid,
+                    series.datatime,
+                    ",".join("%g" % value for value in series.values),
+                )
+            )
 
 
 def blind_set_open(fritz, args):
@@ -201,6 +228,12 @@ def main(args=None):
     parser.add_argument(
         "-v", action="store_true", dest="verbose", help="be more verbose"
     )
+    parser.add_argument(
+        "--trace-xml",
+        action="store_true",
+        dest="trace_xml",
+        help="log the raw XML of every parsed element, implies -v",
+    )
     parser.add_argument(
         "-f",
         "--fritzbox",
@@ -211,6 +244,14 @@ def main(args=None):
     )
     parser.add_argument("-u", "--user", type=str, dest="user", help="Username")
     parser.add_argument("-p", "--password", type=str, dest="password", help="Username")
+    parser.add_argument(
+        "--sid-cache",
+        type=str,
+        dest="sid_cache",
+        metavar="FILE",
+        help="Reuse the session ID stored in FILE instead of a new login",
+        default=None,
+    )
     parser.add_argument(
         "-a",
         "--ain",
@@ -231,6 +272,12 @@ def main(args=None):
 
     # list all devices
     subparser = _sub.add_parser("list", help="List all available devices")
+    subparser.add_argument(
+        "--fields",
+        type=str,
+        default=None,
+        help="Only decode and print these comma separated attributes",
+    )
     subparser.set_defaults(func=list_all)
 
     # device
@@ -380,16 +427,27 @@ def main(args=None):
     args = parser.parse_args(args)
 
     logging.basicConfig()
-    if args.verbose:
+    if args.verbose or args.trace_xml:
         logging.getLogger("pyfritzhome").setLevel(logging.DEBUG)
+        tracing.enable(xml=args.trace_xml)
+
+    sid_cache = None
+    if args.sid_cache:
+        sid_cache = SessionCache(args.sid_cache)
 
     fritzbox = None
     try:
-        fritzbox = Fritzhome(host=args.host, user=args.user, password=args.password)
+        fritzbox = Fritzhome(
+            host=args.host,
+            user=args.user,
+            password=args.password,
+            sid_cache=sid_cache,
+        )
         fritzbox.login()
         args.func(fritzbox, args)
     finally:
-        if fritzbox is not None:
+        # keep the cached session alive for the next run
+        if fritzbox is not None and sid_cache is None:
             fritzbox.logout()
 
 
@@ -0,0 +1,195 @@
+"""Parser for the device statistics of getbasicdevicestats."""
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+import time
+from array import array
+from xml.etree import ElementTree
+
+try:
+    import numpy  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# divisors of the raw values, the values are stored in
+# degree celsius, percent, volt, watt and watt hours
+_SCALES = {
+    "temperature": 10.0,
+    "humidity": 1.0,
+    "voltage": 1000.0,
+    "power": 100.0,
+    "energy": 1.0,
+}
+
+
+def _parse_values(text, scale):
+    """Parse the comma separated values, missing values are NaN."""
+    nan = math.nan
+    if not text:
+        return array("d")
+    if scale == 1.0:
+        return array("d", [nan if v == "-" else float(v) for v in text.split(",")])
+    return array("d", [nan if v == "-" else int(v) / scale for v in text.split(",")])
+
+
+class FritzhomeDeviceStatsSeries(object):
+    """A series of values of one category with a fixed grid.
+
+    The values are stored in an ``array("d")`` with the newest value
+    first, missing values are NaN. ``grid`` is the interval of the values
+    in seconds and ``datatime`` the unix time of the newest value, which
+    is None for older firmware versions.
+    """
+
+    __slots__ = ("category", "grid", "datatime", "values")
+
+    def __init__(self, category, grid, datatime=None, values=None):
+        """Create a series."""
+        self.category = category
+        self.grid = grid
+        self.datatime = datatime
+        self.values = array("d") if values is None else values
+
+    def __repr__(self):
+        """Return a string."""
+        return "FritzhomeDeviceStatsSeries({0}, grid={1}, count={2})".format(
+            self.category, self.grid, len(self.values)
+        )
+
+    def __len__(self):
+        """Get the number of values."""
+        return len(self.values)
+
+    @classmethod
+    def from_element(cls, category, element):
+        """Parse a stats element."""
+        datatime = element.attrib.get("datatime")
+        return cls(
+            category,
+            int(element.attrib["grid"]),
+            None if datatime is None else int(datatime),
+            _parse_values(element.text, _SCALES.get(category, 1.0)),
+        )
+
+    def get_timestamps(self, datatime=None):
+        """Get the unix times of the values as ``array("d")``.
+
+        The time of the newest value is taken from ``datatime`` if the
+        series has none, for example the time of the request.
+        """
+        if self.datatime is not None:
+            datatime = self.datatime
+        if datatime is None:
+            raise ValueError("the series has no datatime")
+        grid = self.grid
+        return array("d", [datatime - i * grid for i in range(len(self.values))])
+
+    def items(self, datatime=None):
+        """Iterate over the (timestamp, value) pairs, the newest first."""
+        return zip(self.get_timestamps(datatime), self.values)
+
+    def as_numpy(self):
+        """Get the values as numpy array sharing the memory of the series."""
+        if numpy is None:
+            raise RuntimeError("numpy is required for as_numpy()")
+        return numpy.frombuffer(self.values, dtype=numpy.float64)
+
+
+class FritzhomeDeviceStats(object):
+    """The statistics of a device, series grouped by category.
+
+    A category like ``energy`` can have several series with different
+    grids, for example the last days and the last months.
+    """
+
+    def __init__(self, series=None):
+        """Create the statistics, series maps the categories to lists."""
+        self.series = {} if series is None else series
+
+    def __repr__(self):
+        """Return a string."""
+        return "FritzhomeDeviceStats({0})".format(sorted(self.series))
+
+    @classmethod
+    def from_xml(cls, plain):
+        """Parse the response of getbasicdevicestats."""
+        dom = ElementTree.fromstring(plain)
+        series = {}
+        for category in dom:
+            series[category.tag] = [
+                FritzhomeDeviceStatsSeries.from_element(category.tag, stats)
+                for stats in category.iter("stats")
+            ]
+        return cls(series)
+
+    def get_next_update(self, fetched_at):
+        """Get the unix time of the next grid boundary of all series.
+
+        The boundary is the first one after ``fetched_at``, also for series
+        whose newest value is older than one grid. Series without datatime
+        are expected to change one grid after they were fetched.
+        """
+        boundaries = []
+        for items in self.series.values():
+            for series in items:
+                if series.datatime is None:
+                    boundaries.append(fetched_at + series.grid)
+                    continue
+                grids = (fetched_at - series.datatime) // series.grid + 1
+                boundaries.append(series.datatime + grids * series.grid)
+        return min(boundaries, default=fetched_at)
+
+    def get_categories(self):
+        """Get the categories with statistics."""
+        return list(self.series.keys())
+
+    def get_series(self, category, grid=None):
+        """Get the series of the category, only with the grid if set."""
+        series = self.series.get(category, [])
+        if grid is None:
+            return list(series)
+        return [item for item in series if item.grid == grid]
+
+
+class FritzhomeDeviceStatsCache(object):
+    """Cache the statistics of the devices until the next grid boundary.
+
+    The statistics only change once per grid interval, an entry is kept
+    until the next boundary of its series with the smallest grid.
+    """
+
+    def __init__(self):
+        """Create an empty cache."""
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, ain, now=None):
+        """Get the cached (plain, stats) of the device or None."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            entry = self._entries.get(ain)
+            if entry is None:
+                return None
+            if now >= entry[2]:
+                del self._entries[ain]
+                return None
+            return entry[:2]
+
+    def set(self, ain, plain, now=None):
+        """Parse and store the statistics of the device, return (plain, stats)."""
+        if now is None:
+            now = time.time()
+        stats = FritzhomeDeviceStats.from_xml(plain)
+        with self._lock:
+            self._entries[ain] = (plain, stats, stats.get_next_update(now))
+        return (plain, stats)
+
+    def invalidate(self, ain=None):
+        """Remove the statistics of the device, of all devices without ain."""
+        with self._lock:
+            if ain is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ain, None)
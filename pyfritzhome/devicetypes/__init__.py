@@ -11,6 +11,7 @@ from .fritzhomedevicetemperature import FritzhomeDeviceTemperature
 from .fritzhomedevicethermostat import FritzhomeDeviceThermostat
 from .fritzhomedevicelightbulb import FritzhomeDeviceLightBulb
 from .fritzhomedeviceblind import FritzhomeDeviceBlind
+from .fritzhomedeviceprofile import FritzhomeDeviceProfile
 from .fritzhometemplate import FritzhomeTemplate
 from .fritzhometrigger import FritzhomeTrigger
 
@@ -27,6 +28,7 @@ __all__ = (
     "FritzhomeDeviceThermostat",
     "FritzhomeDeviceLightBulb",
     "FritzhomeDeviceBlind",
+    "FritzhomeDeviceProfile",
     "FritzhomeTemplate",
     "FritzhomeTrigger",
 )
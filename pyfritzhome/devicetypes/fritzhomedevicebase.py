@@ -37,32 +37,31 @@ class FritzhomeDeviceBase(FritzhomeEntityBase):
 
     def update(self):
         """Update the device values."""
-        self._fritz.update_devices()
+        return self._fritz.update_devices()
 
-    def _update_from_node(self, node):
-        _LOGGER.debug("update base device")
-        super()._update_from_node(node)
+    def _update_base_from_children(self, node, children):
+        """Update the base values, children maps the tags to the elements."""
         self.ain = node.attrib["identifier"]
         self.identifier = node.attrib["id"]
         self.fw_version = node.attrib["fwversion"]
         self.manufacturer = node.attrib["manufacturer"]
         self.productname = node.attrib["productname"]
 
-        self.present = bool(int(node.findtext("present")))
+        self.present = bool(int(self._get_child_text(children, "present")))
 
-        groupinfo = node.find("groupinfo")
+        groupinfo = children.get("groupinfo")
         self.is_group = groupinfo is not None
         if self.is_group:
             self.group_members = str(groupinfo.findtext("members")).split(",")
 
         try:
-            self.tx_busy = self.get_node_value_as_int_as_bool(node, "txbusy")
+            self.tx_busy = bool(int(self._get_child_text(children, "txbusy")))
         except Exception:
             pass
 
         try:
-            self.battery_low = self.get_node_value_as_int_as_bool(node, "batterylow")
-            self.battery_level = int(self.get_node_value_as_int(node, "battery"))
+            self.battery_low = bool(int(self._get_child_text(children, "batterylow")))
+            self.battery_level = int(self._get_child_text(children, "battery"))
         except Exception:
             pass
 
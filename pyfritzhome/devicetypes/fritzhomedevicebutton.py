@@ -3,9 +3,8 @@
 
 import logging
 
-from xml.etree import ElementTree
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -13,25 +12,20 @@ _LOGGER = logging.getLogger(__name__)
 class FritzhomeDeviceButton(FritzhomeDeviceBase):
     """The Fritzhome Device class."""
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_button:
-            self._update_button_from_node(node)
+    buttons: dict
 
     # Button
     @property
     def has_button(self):
         """Check if the device has button function."""
-        return self._has_feature(FritzhomeDeviceFeatures.BUTTON)
+        return self._profile.has_button
 
-    def _update_button_from_node(self, node):
-        _LOGGER.debug("update button device")
+    def _update_button_from_elements(self, elements):
+        if tracing.enabled:
+            _LOGGER.debug("update button device")
         self.buttons = {}
 
-        for element in node.findall("button"):
+        for element in elements:
             button = FritzhomeButton(element)
             self.buttons[button.ain] = button
 
@@ -39,6 +33,13 @@ class FritzhomeDeviceButton(FritzhomeDeviceBase):
         """Return the button by AIN."""
         return self.buttons[ain]
 
+    def subscribe_button(self, ain, callback):
+        """Subscribe to the presses of a button.
+
+        Return a function to unsubscribe.
+        """
+        return self._fritz.subscribe(ain, "last_pressed", callback)
+
 
 class FritzhomeButton(object):
     """The Fritzhome Button Device class."""
@@ -54,7 +55,8 @@ class FritzhomeButton(object):
             self._update_from_node(node)
 
     def _update_from_node(self, node):
-        _LOGGER.debug(ElementTree.tostring(node))
+        if tracing.capture_xml:
+            tracing.trace_xml(_LOGGER, node)
         self.ain = node.attrib["identifier"]
         self.identifier = node.attrib["id"]
         self.name = node.findtext("name")
@@ -63,6 +65,14 @@ class FritzhomeButton(object):
         except ValueError:
             pass
 
+    def _get_values(self):
+        """Get the public attribute values of the button."""
+        return {
+            name: value
+            for (name, value) in vars(self).items()
+            if not name.startswith("_")
+        }
+
     def get_node_value(self, elem, node):
         """Get the node value."""
         return elem.findtext(node)
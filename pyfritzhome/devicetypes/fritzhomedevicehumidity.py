@@ -3,8 +3,8 @@
 
 import logging
 
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,23 +14,15 @@ class FritzhomeDeviceHumidity(FritzhomeDeviceBase):
 
     rel_humidity = None
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_humidity_sensor:
-            self._update_humidity_from_node(node)
-
     # Humidity
     @property
     def has_humidity_sensor(self):
         """Check if the device has humidity function."""
-        return self._has_feature(FritzhomeDeviceFeatures.HUMIDITY)
+        return self._profile.has_humidity_sensor
 
-    def _update_humidity_from_node(self, node):
-        _LOGGER.debug("update humidity device")
-        humidity_element = node.find("humidity")
+    def _update_humidity_from_element(self, humidity_element):
+        if tracing.enabled:
+            _LOGGER.debug("update humidity device")
         try:
             self.rel_humidity = self.get_node_value_as_int(
                 humidity_element, "rel_humidity"
@@ -3,8 +3,8 @@
 
 import logging
 
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,23 +15,15 @@ class FritzhomeDeviceLevel(FritzhomeDeviceBase):
     level = None
     levelpercentage = None
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_level:
-            self._update_level_from_node(node)
-
     # Level
     @property
     def has_level(self):
         """Check if the device has level function."""
-        return self._has_feature(FritzhomeDeviceFeatures.LEVEL)
+        return self._profile.has_level
 
-    def _update_level_from_node(self, node):
-        _LOGGER.debug("update level device")
-        levelcontrol_element = node.find("levelcontrol")
+    def _update_level_from_element(self, levelcontrol_element):
+        if tracing.enabled:
+            _LOGGER.debug("update level device")
         try:
             self.level = self.get_node_value_as_int(levelcontrol_element, "level")
             self.levelpercentage = self.get_node_value_as_int(
@@ -50,8 +42,8 @@ class FritzhomeDeviceLevel(FritzhomeDeviceBase):
 
     def set_level(self, level, wait=False):
         """Set the level."""
-        self._fritz.set_level(self.ain, level, wait)
+        return self._fritz.set_level(self.ain, level, wait)
 
     def set_level_percentage(self, levelpercentage, wait=False):
         """Set the level in percentage."""
-        self._fritz.set_level_percentage(self.ain, levelpercentage, wait)
+        return self._fritz.set_level_percentage(self.ain, levelpercentage, wait)
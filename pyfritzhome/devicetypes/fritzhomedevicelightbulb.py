@@ -4,8 +4,8 @@
 
 import logging
 
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,94 +23,85 @@ class FritzhomeDeviceLightBulb(FritzhomeDeviceBase):
     supported_color_mode = None
     fullcolorsupport: bool = False
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_lightbulb:
-            self._update_lightbulb_from_node(node)
-
     # Light Bulb
     @property
     def has_lightbulb(self):
         """Check if the device has LightBulb function."""
-        return self._has_feature(FritzhomeDeviceFeatures.LIGHTBULB)
+        return self._profile.has_lightbulb
 
     @property
     def has_color(self):
         """Check if the device has LightBulb function."""
-        return self._has_feature(FritzhomeDeviceFeatures.COLOR)
+        return self._profile.has_color
 
-    def _update_lightbulb_from_node(self, node):
-        _LOGGER.debug("update light bulb device")
-        state_element = node.find("simpleonoff")
+    def _update_lightbulb_from_element(self, state_element):
+        if tracing.enabled:
+            _LOGGER.debug("update light bulb device")
         try:
             self.state = self.get_node_value_as_int_as_bool(state_element, "state")
 
         except ValueError:
             pass
 
-        if self.has_color:
-            colorcontrol_element = node.find("colorcontrol")
-            try:
-                self.color_mode = colorcontrol_element.attrib.get("current_mode")
-
-                self.supported_color_mode = colorcontrol_element.attrib.get(
-                    "supported_modes"
-                )
-
-                self.fullcolorsupport = bool(
-                    colorcontrol_element.attrib.get("fullcolorsupport")
-                )
-
-            except ValueError:
-                pass
-
-            try:
-                self.hue = self.get_node_value_as_int(colorcontrol_element, "hue")
-
-                self.saturation = self.get_node_value_as_int(
-                    colorcontrol_element, "saturation"
-                )
-
-                self.unmapped_hue = self.get_node_value_as_int(
-                    colorcontrol_element, "unmapped_hue"
-                )
-
-                self.unmapped_saturation = self.get_node_value_as_int(
-                    colorcontrol_element, "unmapped_saturation"
-                )
-            except ValueError:
-                # reset values after color mode changed
-                self.hue = None
-                self.saturation = None
-                self.unmapped_hue = None
-                self.unmapped_saturation = None
-
-            try:
-                self.color_temp = self.get_node_value_as_int(
-                    colorcontrol_element, "temperature"
-                )
-
-            except ValueError:
-                # reset values after color mode changed
-                self.color_temp = None
+    def _update_colorcontrol_from_element(self, colorcontrol_element):
+        try:
+            self.color_mode = colorcontrol_element.attrib.get("current_mode")
+
+            self.supported_color_mode = colorcontrol_element.attrib.get(
+                "supported_modes"
+            )
+
+            self.fullcolorsupport = bool(
+                colorcontrol_element.attrib.get("fullcolorsupport")
+            )
+
+        except ValueError:
+            pass
+
+        try:
+            self.hue = self.get_node_value_as_int(colorcontrol_element, "hue")
+
+            self.saturation = self.get_node_value_as_int(
+                colorcontrol_element, "saturation"
+            )
+
+            self.unmapped_hue = self.get_node_value_as_int(
+                colorcontrol_element, "unmapped_hue"
+            )
+
+            self.unmapped_saturation = self.get_node_value_as_int(
+                colorcontrol_element, "unmapped_saturation"
+            )
+        except ValueError:
+            # reset values after color mode changed
+            self.hue = None
+            self.saturation = None
+            self.unmapped_hue = None
+            self.unmapped_saturation = None
+
+        try:
+            self.color_temp = self.get_node_value_as_int(
+                colorcontrol_element, "temperature"
+            )
+
+        except ValueError:
+            # reset values after color mode changed
+            self.color_temp = None
 
     def set_state_off(self, wait=False):
         """Switch light bulb off."""
         self.state = True
-        self._fritz.set_state_off(self.ain, wait)
+        return self._fritz.set_state_off(self.ain, wait)
 
     def set_state_on(self, wait=False):
         """Switch light bulb on."""
         self.state = True
-        self._fritz.set_state_on(self.ain, wait)
+        return self._fritz.set_state_on(self.ain, wait)
 
     def set_state_toggle(self, wait=False):
         """Toogle light bulb state."""
         self.state = True
-        self._fritz.set_state_toggle(self.ain, wait)
+        return self._fritz.set_state_toggle(self.ain, wait)
 
     def get_colors(self):
         """Get the supported colors."""
@@ -122,12 +113,12 @@ class FritzhomeDeviceLightBulb(FritzhomeDeviceBase):
     def set_color(self, hsv, duration=0, wait=False):
         """Set HSV color."""
         if self.has_color:
-            self._fritz.set_color(self.ain, hsv, duration, True, wait)
+            return self._fritz.set_color(self.ain, hsv, duration, True, wait)
 
     def set_unmapped_color(self, hsv, duration=0, wait=False):
         """Set unmapped HSV color (Free color selection)."""
         if self.has_color and self.fullcolorsupport:
-            self._fritz.set_color(self.ain, hsv, duration, False, wait)
+            return self._fritz.set_color(self.ain, hsv, duration, False, wait)
 
     def get_color_temps(self):
         """Get the supported color temperatures energy."""
@@ -139,4 +130,4 @@ class FritzhomeDeviceLightBulb(FritzhomeDeviceBase):
     def set_color_temp(self, temperature, duration=0, wait=False):
         """Set white color temperature."""
         if self.has_color:
-            self._fritz.set_color_temp(self.ain, temperature, duration, wait)
+            return self._fritz.set_color_temp(self.ain, temperature, duration, wait)
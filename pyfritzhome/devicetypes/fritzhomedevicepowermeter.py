@@ -3,8 +3,8 @@
 
 import logging
 
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,23 +17,15 @@ class FritzhomeDevicePowermeter(FritzhomeDeviceBase):
     voltage = None
     current = None
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_powermeter:
-            self._update_powermeter_from_node(node)
-
     # Power Meter
     @property
     def has_powermeter(self):
         """Check if the device has powermeter function."""
-        return self._has_feature(FritzhomeDeviceFeatures.POWER_METER)
+        return self._profile.has_powermeter
 
-    def _update_powermeter_from_node(self, node):
-        _LOGGER.debug("update powermeter device")
-        val = node.find("powermeter")
+    def _update_powermeter_from_element(self, val):
+        if tracing.enabled:
+            _LOGGER.debug("update powermeter device")
 
         try:
             self.power = int(val.findtext("power"))
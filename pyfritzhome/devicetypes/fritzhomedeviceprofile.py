@@ -0,0 +1,131 @@
+"""The capability profile class."""
+# -*- coding: utf-8 -*-
+
+import threading
+
+from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
+
+
+class FritzhomeDeviceProfile(object):
+    """The capabilities of a function bitmask.
+
+    Profiles are immutable and interned, all entities with the same
+    function bitmask share one profile object. Use ``get()`` to obtain a
+    profile. The ``supported_features`` list is shared as well and must
+    not be modified.
+    """
+
+    __slots__ = (
+        "functionsbitmask",
+        "features",
+        "supported_features",
+        "has_alarm",
+        "has_blind",
+        "has_button",
+        "has_color",
+        "has_humidity_sensor",
+        "has_level",
+        "has_lightbulb",
+        "has_powermeter",
+        "has_repeater",
+        "has_switch",
+        "has_temperature_sensor",
+        "has_thermostat",
+        "parse_plan",
+        "_feature_set",
+    )
+
+    _profiles: dict = {}
+    _lock = threading.Lock()
+
+    def __init__(self, functionsbitmask):
+        """Create a profile, use get() to share the profiles."""
+        self.functionsbitmask = functionsbitmask
+        self.features = FritzhomeDeviceFeatures(functionsbitmask)
+        self.supported_features = [
+            feature for feature in FritzhomeDeviceFeatures if feature in self.features
+        ]
+        self._feature_set = frozenset(self.supported_features)
+
+        has = self.has_feature
+        self.has_alarm = has(FritzhomeDeviceFeatures.ALARM)
+        self.has_blind = has(FritzhomeDeviceFeatures.BLIND)
+        self.has_button = has(FritzhomeDeviceFeatures.BUTTON)
+        self.has_color = has(FritzhomeDeviceFeatures.COLOR)
+        self.has_humidity_sensor = has(FritzhomeDeviceFeatures.HUMIDITY)
+        self.has_level = has(FritzhomeDeviceFeatures.LEVEL)
+        self.has_lightbulb = has(FritzhomeDeviceFeatures.LIGHTBULB)
+        self.has_powermeter = has(FritzhomeDeviceFeatures.POWER_METER)
+        self.has_repeater = has(FritzhomeDeviceFeatures.DECT_REPEATER)
+        # AVM plugs like FRITZ!DECT 200 or HAN-FUN plugs
+        self.has_switch = has(FritzhomeDeviceFeatures.SWITCH) or (
+            has(FritzhomeDeviceFeatures.SWITCHABLE)
+            and not has(FritzhomeDeviceFeatures.LIGHTBULB)
+        )
+        self.has_temperature_sensor = has(FritzhomeDeviceFeatures.TEMPERATURE)
+        self.has_thermostat = has(FritzhomeDeviceFeatures.THERMOSTAT)
+        self.parse_plan = self._compile_parse_plan()
+
+    @classmethod
+    def get(cls, functionsbitmask):
+        """Get the shared profile of the function bitmask."""
+        profile = cls._profiles.get(functionsbitmask)
+        if profile is None:
+            with cls._lock:
+                profile = cls._profiles.get(functionsbitmask)
+                if profile is None:
+                    profile = cls(functionsbitmask)
+                    cls._profiles[functionsbitmask] = profile
+        return profile
+
+    def __setattr__(self, name, value):
+        """Set every attribute only once."""
+        if hasattr(self, name):
+            raise AttributeError("profiles are immutable")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        """Refuse to change the profile."""
+        raise AttributeError("profiles are immutable")
+
+    def __repr__(self):
+        """Return a string."""
+        return "FritzhomeDeviceProfile({0})".format(self.functionsbitmask)
+
+    def has_feature(self, feature):
+        """Check if the profile has the feature."""
+        return feature in self._feature_set
+
+    def _compile_parse_plan(self):
+        """Select the section decoders with the XML tag they decode.
+
+        The decoders are named by their method and are listed in the order
+        of the device type classes.
+        """
+        plan = []
+        if self.has_thermostat:
+            plan.append(("_update_hkr_from_element", "hkr"))
+        if self.has_temperature_sensor:
+            plan.append(("_update_temperature_from_element", "temperature"))
+        if self.has_switch:
+            if self.has_feature(FritzhomeDeviceFeatures.SWITCH):
+                plan.append(("_update_switch_from_element", "switch"))
+            else:
+                plan.append(("_update_simpleonoff_switch_from_element", "simpleonoff"))
+        if self.has_powermeter:
+            plan.append(("_update_powermeter_from_element", "powermeter"))
+        if self.has_lightbulb:
+            plan.append(("_update_lightbulb_from_element", "simpleonoff"))
+            if self.has_color:
+                plan.append(("_update_colorcontrol_from_element", "colorcontrol"))
+        if self.has_level:
+            plan.append(("_update_level_from_element", "levelcontrol"))
+        if self.has_humidity_sensor:
+            plan.append(("_update_humidity_from_element", "humidity"))
+        if self.has_button:
+            plan.append(("_update_button_from_elements", "button"))
+        if self.has_blind:
+            plan.append(("_update_blind_from_element", "blind"))
+        if self.has_alarm:
+            plan.append(("_update_alarm_from_element", "alert"))
+        return tuple(plan)
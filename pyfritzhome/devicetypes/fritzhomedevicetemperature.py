@@ -3,8 +3,8 @@
 
 import logging
 
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,23 +15,15 @@ class FritzhomeDeviceTemperature(FritzhomeDeviceBase):
     offset = None
     temperature = None
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_temperature_sensor:
-            self._update_temperature_from_node(node)
-
     # Temperature
     @property
     def has_temperature_sensor(self):
         """Check if the device has temperature function."""
-        return self._has_feature(FritzhomeDeviceFeatures.TEMPERATURE)
+        return self._profile.has_temperature_sensor
 
-    def _update_temperature_from_node(self, node):
-        _LOGGER.debug("update temperature device")
-        temperature_element = node.find("temperature")
+    def _update_temperature_from_element(self, temperature_element):
+        if tracing.enabled:
+            _LOGGER.debug("update temperature device")
         try:
             self.offset = (
                 self.get_node_value_as_int(temperature_element, "offset") / 10.0
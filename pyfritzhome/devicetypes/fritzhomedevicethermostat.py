@@ -4,8 +4,8 @@
 import logging
 import time
 
+from .. import tracing
 from .fritzhomedevicebase import FritzhomeDeviceBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,23 +31,15 @@ class FritzhomeDeviceThermostat(FritzhomeDeviceBase):
     nextchange_endperiod = None
     nextchange_temperature = None
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
-        if self.present is False:
-            return
-
-        if self.has_thermostat:
-            self._update_hkr_from_node(node)
-
     # Thermostat
     @property
     def has_thermostat(self):
         """Check if the device has thermostat function."""
-        return self._has_feature(FritzhomeDeviceFeatures.THERMOSTAT)
+        return self._profile.has_thermostat
 
-    def _update_hkr_from_node(self, node):
-        _LOGGER.debug("update thermostat device")
-        hkr_element = node.find("hkr")
+    def _update_hkr_from_element(self, hkr_element):
+        if tracing.enabled:
+            _LOGGER.debug("update thermostat device")
 
         try:
             self.actual_temperature = self.get_temp_from_node(hkr_element, "tist")
@@ -179,4 +171,4 @@ class FritzhomeDeviceThermostat(FritzhomeDeviceBase):
         except KeyError:
             return
 
-        self.set_target_temperature(value, wait)
+        return self.set_target_temperature(value, wait)
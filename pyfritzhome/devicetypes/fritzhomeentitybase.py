@@ -7,8 +7,9 @@ from abc import ABC
 
 
 import logging
-from xml.etree import ElementTree
+from .. import tracing
 from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
+from .fritzhomedeviceprofile import FritzhomeDeviceProfile
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,7 +19,9 @@ class FritzhomeEntityBase(ABC):
 
     _fritz = None
     ain: str
+    name: str
     _functionsbitmask: int = 0
+    _profile = FritzhomeDeviceProfile.get(0)
     supported_features = None
 
     def __init__(self, fritz=None, node=None):
@@ -35,20 +38,36 @@ class FritzhomeEntityBase(ABC):
             name=self.name,
         )
 
+    def _get_values(self):
+        """Get the public attribute values of the entity."""
+        return {
+            name: value
+            for (name, value) in vars(self).items()
+            if not name.startswith("_")
+        }
+
+    def subscribe(self, name, callback):
+        """Subscribe to the changes of an attribute value of the entity.
+
+        Return a function to unsubscribe.
+        """
+        return self._fritz.subscribe(self.ain, name, callback)
+
     def _has_feature(self, feature: FritzhomeDeviceFeatures) -> bool:
-        return feature in FritzhomeDeviceFeatures(self._functionsbitmask)
+        return self._profile.has_feature(feature)
 
     def _update_from_node(self, node):
-        _LOGGER.debug(ElementTree.tostring(node))
+        if tracing.capture_xml:
+            tracing.trace_xml(_LOGGER, node)
+        self._update_entity_from_node(node, node.findtext("name"))
+
+    def _update_entity_from_node(self, node, name):
         self.ain = node.attrib["identifier"]
         self._functionsbitmask = int(node.attrib["functionbitmask"])
+        self._profile = FritzhomeDeviceProfile.get(self._functionsbitmask)
 
-        self.name = node.findtext("name").strip()
-
-        self.supported_features = []
-        for feature in FritzhomeDeviceFeatures:
-            if self._has_feature(feature):
-                self.supported_features.append(feature)
+        self.name = name.strip()
+        self.supported_features = self._profile.supported_features
 
     @property
     def device_and_unit_id(self):
@@ -67,6 +86,14 @@ class FritzhomeEntityBase(ABC):
 
     # XML Helpers
 
+    @staticmethod
+    def _get_child_text(children, tag):
+        """Get the text of a child element like findtext does."""
+        element = children.get(tag)
+        if element is None:
+            return None
+        return element.text or ""
+
     def get_node_value(self, elem, node):
         """Get the node value."""
         return elem.findtext(node)
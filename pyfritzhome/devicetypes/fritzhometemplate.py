@@ -3,8 +3,8 @@
 
 import logging
 
+from .. import tracing
 from .fritzhomeentitybase import FritzhomeEntityBase
-from .fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,10 +25,11 @@ class FritzhomeTemplate(FritzhomeEntityBase):
     apply_dialhelper = None
 
     def _update_from_node(self, node):
-        _LOGGER.debug("update template")
+        if tracing.enabled:
+            _LOGGER.debug("update template")
         super()._update_from_node(node)
 
-        self.features = FritzhomeDeviceFeatures(self._functionsbitmask)
+        self.features = self._profile.features
 
         applymask = node.find("applymask")
         self.apply_hkr_summer = applymask.find("hkr_summer") is not None
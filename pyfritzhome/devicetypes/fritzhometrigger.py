@@ -2,8 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from xml.etree import ElementTree
 
+from .. import tracing
 from .fritzhomeentitybase import FritzhomeEntityBase
 
 _LOGGER = logging.getLogger(__name__)
@@ -15,8 +15,10 @@ class FritzhomeTrigger(FritzhomeEntityBase):
     active = None
 
     def _update_from_node(self, node):
-        _LOGGER.debug("update trigger")
-        _LOGGER.debug(ElementTree.tostring(node))
+        if tracing.enabled:
+            _LOGGER.debug("update trigger")
+        if tracing.capture_xml:
+            tracing.trace_xml(_LOGGER, node)
         self.ain = node.attrib["identifier"]
         self.name = node.findtext("name").strip()
         self.active = node.attrib["active"] == "1"
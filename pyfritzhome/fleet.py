@@ -0,0 +1,218 @@
+"""Concurrent polling of many Fritz!Boxes."""
+# -*- coding: utf-8 -*-
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests import exceptions
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Box(object):
+    """Polling state of one Fritz!Box."""
+
+    def __init__(self, name, fritz, next_poll):
+        """Create the state of a box."""
+        self.name = name
+        self.fritz = fritz
+        self.next_poll = next_poll
+        self.polling = False
+        self.failures = 0
+        self.last_error = None
+        self.last_update = None
+        self.devices = {}
+
+
+class FritzhomeFleet(object):
+    """Poll the devices of many Fritz!Boxes concurrently.
+
+    Every box is polled once per ``interval`` seconds, the schedule of
+    each box is shifted by a random ``jitter`` (fraction of the interval)
+    to spread the requests over the poll period. A box is never polled
+    twice at the same time, so a slow box only blocks one worker. A
+    failing box is isolated with an exponential backoff up to
+    ``max_backoff`` seconds. A box rejecting the session ID is logged in
+    again.
+
+    The devices of all boxes are merged into one registry with
+    ``(name, ain)`` keys.
+    """
+
+    def __init__(self, interval=60.0, jitter=0.1, max_workers=16, max_backoff=900.0):
+        """Create an empty fleet."""
+        self._interval = interval
+        self._jitter = jitter
+        self._max_workers = max_workers
+        self._max_backoff = max_backoff
+        self._boxes = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+
+    def add(self, name, fritz):
+        """Add a Fritzhome client with a unique name."""
+        with self._lock:
+            if name in self._boxes:
+                raise ValueError("box {0} already exists".format(name))
+            # spread the first polls over the whole interval
+            next_poll = time.monotonic() + random.uniform(0, self._interval)
+            self._boxes[name] = _Box(name, fritz, next_poll)
+        self._wakeup.set()
+
+    def remove(self, name):
+        """Remove the box and its devices from the fleet."""
+        with self._lock:
+            self._boxes.pop(name)
+
+    def get_names(self):
+        """Get the names of all boxes."""
+        with self._lock:
+            return list(self._boxes.keys())
+
+    def get_fritzhome(self, name):
+        """Get the Fritzhome client of a box."""
+        with self._lock:
+            return self._boxes[name].fritz
+
+    def get_status(self, name):
+        """Get the failure count, last error and last update time of a box."""
+        with self._lock:
+            box = self._boxes[name]
+            return (box.failures, box.last_error, box.last_update)
+
+    # Registry
+
+    def get_devices_as_dict(self):
+        """Get the devices of all boxes with (name, ain) keys."""
+        with self._lock:
+            devices = {}
+            for box in self._boxes.values():
+                for ain, device in box.devices.items():
+                    devices[(box.name, ain)] = device
+            return devices
+
+    def get_devices(self):
+        """Get the list of the devices of all boxes."""
+        return list(self.get_devices_as_dict().values())
+
+    def get_device(self, name, ain):
+        """Return a device specified by the box name and the AIN."""
+        with self._lock:
+            return self._boxes[name].devices[ain]
+
+    # Polling
+
+    def poll(self, names=None):
+        """Poll the boxes concurrently and wait for the results.
+
+        All boxes are polled if names is not set. Boxes already being
+        polled by the background scheduler are skipped.
+
+        Return a dictionary with the exception of every failed box.
+        """
+        with self._lock:
+            if names is None:
+                names = list(self._boxes.keys())
+            boxes = [self._boxes[name] for name in names]
+            boxes = [box for box in boxes if not box.polling]
+            for box in boxes:
+                box.polling = True
+        if not boxes:
+            return {}
+
+        max_workers = min(self._max_workers, len(boxes))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            errors = list(executor.map(self._poll_box, boxes))
+        return {
+            box.name: error for (box, error) in zip(boxes, errors) if error is not None
+        }
+
+    def _poll_box(self, box):
+        """Update the devices of one box, return the error on failure."""
+        error = None
+        devices = None
+        try:
+            fritz = box.fritz
+            if not fritz.is_logged_in():
+                fritz.login()
+            try:
+                fritz.update_devices(ignore_removed=False)
+            except exceptions.HTTPError as ex:
+                if ex.response is None or ex.response.status_code != 403:
+                    raise
+                # the session expired or the box was restarted
+                _LOGGER.info("session of %s expired, login again", box.name)
+                fritz.login()
+                fritz.update_devices(ignore_removed=False)
+            devices = dict(fritz.get_devices_as_dict())
+        except Exception as ex:
+            _LOGGER.warning("polling %s failed: %s", box.name, ex)
+            error = ex
+
+        now = time.monotonic()
+        with self._lock:
+            box.polling = False
+            box.last_error = error
+            if error is None:
+                box.failures = 0
+                box.devices = devices
+                box.last_update = now
+                delay = self._interval * random.uniform(
+                    1 - self._jitter, 1 + self._jitter
+                )
+            else:
+                box.failures += 1
+                delay = min(self._interval * 2 ** (box.failures - 1), self._max_backoff)
+            box.next_poll = now + delay
+        return error
+
+    def start(self):
+        """Start polling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._thread = threading.Thread(target=self._run, name="fritzhome-fleet")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and wait for the running polls."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        self._thread = None
+        self._executor = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                due = []
+                next_poll = now + self._interval
+                for box in self._boxes.values():
+                    if box.polling:
+                        continue
+                    if box.next_poll <= now:
+                        box.polling = True
+                        due.append(box)
+                    else:
+                        next_poll = min(next_poll, box.next_poll)
+            for box in due:
+                self._executor.submit(self._poll_box_and_wake, box)
+            self._wakeup.wait(max(next_poll - now, 0))
+
+    def _poll_box_and_wake(self, box):
+        self._poll_box(box)
+        # reschedule with the new next poll time
+        self._wakeup.set()
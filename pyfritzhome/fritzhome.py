@@ -3,24 +3,66 @@
 
 from __future__ import print_function
 
+import functools
 import hashlib
+import itertools
 import logging
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree import ElementTree
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 from requests import exceptions, Session
+from requests.adapters import HTTPAdapter
 
+from .devicestats import FritzhomeDeviceStats, FritzhomeDeviceStatsCache
 from .errors import InvalidError, LoginError, NotLoggedInError
-from .fritzhomedevice import FritzhomeDevice
+from .fritzhomedevice import FritzhomeDevice, get_device_class, get_projection
 from .fritzhomedevice import FritzhomeTemplate
 from .fritzhomedevice import FritzhomeTrigger
+from .fritzhomedevicestate import FritzhomeDeviceView
+from .fritzhomelazydevice import FritzhomeLazyDevice
+from .indexes import RegistryIndexes
+from .ratelimit import (
+    KIND_READ,
+    KIND_WRITE,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+)
+from .registry import ChangeSet, expire, reconcile
+from .singleflight import SingleFlight
+from .subscriptions import Subscriptions
+from . import tracing
 from typing import Dict, Optional
 
 _LOGGER = logging.getLogger(__name__)
 
+# the raw text of a device or group element with its identifier
+_DEVICE_TEXT = re.compile(
+    r'<(device|group)\b[^>]*?\sidentifier="([^"]*)".*?</\1>', re.DOTALL
+)
+
+
+class _ListInfo(object):
+    """A fetched entity list shared between concurrent callers."""
+
+    def __init__(self, plain):
+        """Create a list info from the plain response."""
+        self.plain = plain
+        self._elements = None
+        self._lock = threading.Lock()
+
+    def elements(self):
+        """Get the DOM elements, the response is parsed only once."""
+        with self._lock:
+            if self._elements is None:
+                self._elements = Fritzhome._parse_listinfo_elements(self.plain)
+            return self._elements
+
 
 class Fritzhome(object):
     """Fritzhome object to communicate with the device."""
@@ -31,15 +73,124 @@ class Fritzhome(object):
     _templates: Optional[Dict[str, FritzhomeTemplate]] = None
     _triggers: Optional[Dict[str, FritzhomeTrigger]] = None
 
-    def __init__(self, host, user, password, ssl_verify=True):
-        """Create a fritzhome object."""
+    # use getdeviceinfos instead of the device list up to this many devices
+    _TXBUSY_FEW_DEVICES = 3
+
+    # connections kept open for the concurrent requests
+    _POOL_MAXSIZE = 16
+
+    def __init__(
+        self,
+        host,
+        user,
+        password,
+        ssl_verify=True,
+        skip_unchanged=False,
+        listinfo_max_age=0,
+        rate_limiter=None,
+        sid_cache=None,
+        pbkdf2_cache=None,
+        auto_relogin=False,
+        keepalive_interval=None,
+        specialized_devices=False,
+        compact_devices=False,
+        lazy_devices=False,
+        stats_cache=False,
+    ):
+        """Create a fritzhome object.
+
+        With ``skip_unchanged`` the device list response and the raw text of
+        every device element are hashed and unchanged devices are not parsed
+        again.
+
+        Concurrent fetches of the same entity list share one request and
+        its parsed result. ``listinfo_max_age`` additionally reuses a
+        finished list for the given number of seconds.
+
+        A ``RateLimiter`` passed with ``rate_limiter`` throttles all AHA
+        requests. Polling of the entity lists and statistics waits behind
+        the interactive requests.
+
+        With a ``SessionCache`` passed as ``sid_cache`` the session ID is
+        shared between process runs and ``login`` reuses it while valid.
+
+        The static salt stage of the PBKDF2 login is cached in memory. A
+        ``SessionCache`` passed as ``pbkdf2_cache`` keeps it across process
+        runs, a cached value failing the login is computed again once, e.g.
+        after a password change. Note that this value is as sensitive as the
+        password.
+
+        With ``auto_relogin`` an expired session ID is detected, one login
+        is done for all concurrent requests and idempotent requests are
+        retried. ``keepalive_interval`` refreshes the session ID in the
+        background after the given seconds of inactivity, which has to be
+        shorter than the idle timeout of the Fritz!Box (20 minutes).
+
+        With ``specialized_devices`` every device is created from a class
+        containing only the device types of its function bitmask, which
+        stores the values in ``__slots__``. Attributes of the other device
+        types are still available with their defaults.
+
+        With ``compact_devices`` the devices are views on compact
+        ``FritzhomeDeviceState`` records, which only store the decoded
+        values.
+
+        With ``lazy_devices`` the sections of the devices are only decoded
+        when their values are read, see ``FritzhomeLazyDevice``.
+
+        With ``stats_cache`` the device statistics are kept until the next
+        boundary of their grid, when new values are available.
+
+        Only one of ``specialized_devices``, ``compact_devices`` and
+        ``lazy_devices`` can be set, otherwise ValueError is raised.
+        """
+        if sum(map(bool, (specialized_devices, compact_devices, lazy_devices))) > 1:
+            raise ValueError(
+                "only one of specialized_devices, compact_devices and "
+                "lazy_devices can be set"
+            )
         self._host = host
         self._user = user
         self._password = password
-        self._session = Session()
+        self._session = self._create_session()
         self._ssl_verify = ssl_verify
         self._has_getdeviceinfos = True
         self._has_txbusy = True
+        self._skip_unchanged = skip_unchanged
+        self._devicelist_digest = None
+        self._device_digests: Dict[str, bytes] = {}
+        self._update_counters = {"skipped": 0, "parsed": 0}
+        self._subscriptions = Subscriptions()
+        self._indexes = RegistryIndexes()
+        self._tombstones: Dict[str, Dict[str, float]] = {
+            "device": {},
+            "template": {},
+            "trigger": {},
+        }
+        self._listinfo_flight = SingleFlight()
+        self._listinfo_max_age = listinfo_max_age
+        self._rate_limiter = rate_limiter
+        self._sid_cache = sid_cache
+        self._pbkdf2_cache = pbkdf2_cache
+        self._pbkdf2_hashes: Dict[tuple, bytes] = {}
+        self._pbkdf2_hash_from_cache = False
+        self._auto_relogin = auto_relogin
+        self._login_lock = threading.Lock()
+        self._keepalive_interval = keepalive_interval
+        self._keepalive_timer = None
+        self._last_activity = time.monotonic()
+        self._specialized_devices = specialized_devices
+        self._compact_devices = compact_devices
+        self._lazy_devices = lazy_devices
+        self._stats_cache = FritzhomeDeviceStatsCache() if stats_cache else None
+
+    def _create_session(self):
+        """Create the HTTP session used for all requests."""
+        session = Session()
+        adapter = HTTPAdapter(pool_maxsize=self._POOL_MAXSIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def _request(self, url, params=None, timeout=10):
         """Send a request with parameters."""
@@ -49,7 +200,19 @@ class Fritzhome(object):
         rsp.raise_for_status()
         return rsp.text.strip()
 
-    def _login_request(self, username=None, secret=None):
+    def _request_stream(self, url, params=None, timeout=10, chunk_size=8192):
+        """Send a request with parameters and iterate over the raw body."""
+        with self._session.get(
+            url,
+            params=params,
+            timeout=timeout,
+            verify=self._ssl_verify,
+            stream=True,
+        ) as rsp:
+            rsp.raise_for_status()
+            yield from rsp.iter_content(chunk_size)
+
+    def _login_request(self, username=None, secret=None, sid=None):
         """Send a login request with paramerters."""
         url = self.get_prefixed_host() + "/login_sid.lua?version=2"
         params = {}
@@ -57,8 +220,15 @@ class Fritzhome(object):
             params["username"] = username
         if secret:
             params["response"] = secret
+        if sid:
+            params["sid"] = sid
 
         plain = self._request(url, params)
+        return self._parse_login_response(plain)
+
+    @staticmethod
+    def _parse_login_response(plain):
+        """Extract SID, challenge and blocktime from a login response."""
         dom = ElementTree.fromstring(plain)
         sid = dom.findtext("SID")
         blocktime = int(dom.findtext("BlockTime"))
@@ -74,8 +244,67 @@ class Fritzhome(object):
 
         self._request(url, params)
 
+    def _create_login_secret(self, challenge):
+        """Create the login secret matching the challenge type."""
+        self._pbkdf2_hash_from_cache = False
+        # PBKDF2 (FRITZ!OS 7.24 or later)
+        if challenge.startswith("2$"):
+            return self._create_login_secrete_pbkdf2(
+                challenge, self._password, self._get_pbkdf2_static_hash
+            )
+        # fallback to MD5
+        return self._create_login_secret_md5(challenge, self._password)
+
+    def _get_pbkdf2_static_hash(self, password, salt1, iter1):
+        """Get the static salt stage of the PBKDF2 login, cached per salt."""
+        key = (salt1.hex(), iter1)
+        hash1 = self._pbkdf2_hashes.get(key)
+        if hash1 is None and self._pbkdf2_cache is not None:
+            cached = self._pbkdf2_cache.get_pbkdf2_hash(self._host, self._user, *key)
+            if cached:
+                hash1 = bytes.fromhex(cached)
+                # stored by an earlier run, the password may have changed
+                self._pbkdf2_hash_from_cache = True
+        if hash1 is None:
+            hash1 = self._pbkdf2(password.encode(), salt1, iter1)
+            if self._pbkdf2_cache is not None:
+                self._pbkdf2_cache.set_pbkdf2_hash(
+                    self._host, self._user, *key, hash1.hex()
+                )
+        self._pbkdf2_hashes[key] = hash1
+        return hash1
+
+    def _forget_cached_pbkdf2_hash(self):
+        """Forget the static salt stages if the last secret used the cache.
+
+        Return True if the login should be retried with a new hash.
+        """
+        if not self._pbkdf2_hash_from_cache:
+            return False
+        _LOGGER.info("login with the cached PBKDF2 hash failed, retry")
+        self._forget_pbkdf2_static_hashes()
+        return True
+
+    def _forget_pbkdf2_static_hashes(self):
+        """Forget the cached static salt stages, e.g. after a failed login."""
+        self._pbkdf2_hashes.clear()
+        if self._pbkdf2_cache is not None:
+            self._pbkdf2_cache.remove_pbkdf2_hashes(self._host, self._user)
+
+    @staticmethod
+    def _pbkdf2(data, salt, iterations):
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations
+        )
+        return kdf.derive(data)
+
     @staticmethod
-    def _create_login_secrete_pbkdf2(challenge, password):
+    def _create_login_secrete_pbkdf2(challenge, password, static_hash=None):
+        """Create a PBKDF2 login secret.
+
+        static_hash: optional callable (password, salt1, iter1) returning
+        the result of the static salt stage
+        """
         challenge_parts = challenge.split("$")
         # Extract all necessary values encoded into the challenge
         iter1 = int(challenge_parts[1])
@@ -84,16 +313,13 @@ class Fritzhome(object):
         salt2 = bytes.fromhex(challenge_parts[4])
         # Hash twice, once with static salt...
         # hash1 = hashlib.pbkdf2_hmac("sha256", password.encode(), salt1, iter1)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(), length=32, salt=salt1, iterations=iter1
-        )
-        hash1 = kdf.derive(password.encode())
+        if static_hash is not None:
+            hash1 = static_hash(password, salt1, iter1)
+        else:
+            hash1 = Fritzhome._pbkdf2(password.encode(), salt1, iter1)
         # Once with dynamic salt.
         # hash2 = hashlib.pbkdf2_hmac("sha256", hash1, salt2, iter2)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(), length=32, salt=salt2, iterations=iter2
-        )
-        hash2 = kdf.derive(hash1)
+        hash2 = Fritzhome._pbkdf2(hash1, salt2, iter2)
         return f"{challenge_parts[4]}${hash2.hex()}"
 
     @staticmethod
@@ -103,8 +329,8 @@ class Fritzhome(object):
         hashed = hashlib.md5(to_hash).hexdigest()
         return "{0}-{1}".format(challenge, hashed)
 
-    def _aha_request(self, cmd, ain=None, param=None, rf=str):
-        """Send an AHA request."""
+    def _aha_request_params(self, cmd, ain=None, param=None):
+        """Build the URL and parameters of an AHA request."""
         url = self.get_prefixed_host() + "/webservices/homeautoswitch.lua"
 
         _LOGGER.debug("self._sid:%s", self._sid)
@@ -117,8 +343,11 @@ class Fritzhome(object):
             params.update(param)
         if ain:
             params["ain"] = ain
+        return (url, params)
 
-        plain = self._request(url, params)
+    @staticmethod
+    def _aha_response(plain, rf=str):
+        """Convert the plain AHA response with the result function."""
         if plain == "inval":
             raise InvalidError
 
@@ -126,31 +355,225 @@ class Fritzhome(object):
             return bool(int(plain))
         return rf(plain)
 
+    @staticmethod
+    def _is_write_command(cmd):
+        """Check if the AHA command changes a state."""
+        return cmd.startswith("set") or cmd == "applytemplate"
+
+    @staticmethod
+    def _command_priority(cmd):
+        """Get the default scheduling priority of the AHA command."""
+        if cmd.endswith("listinfos") or cmd == "getbasicdevicestats":
+            return PRIORITY_BACKGROUND
+        return PRIORITY_INTERACTIVE
+
+    def _get_rate_limit(self, cmd, priority=None):
+        """Get the kind and the priority of the AHA command for the limiter."""
+        if priority is None:
+            priority = self._command_priority(cmd)
+        kind = KIND_WRITE if self._is_write_command(cmd) else KIND_READ
+        return (kind, priority)
+
+    @staticmethod
+    def _is_idempotent(cmd, param=None):
+        """Check if the AHA command can be repeated safely."""
+        if cmd == "setswitchtoggle":
+            return False
+        if cmd == "setsimpleonoff" and param and param.get("onoff") == 2:
+            return False
+        return True
+
+    def _is_session_expired(self, ex):
+        """Check if the HTTP error is caused by an expired session ID."""
+        return (
+            self._auto_relogin
+            and ex.response is not None
+            and ex.response.status_code == 403
+        )
+
+    def _aha_request(self, cmd, ain=None, param=None, rf=str, priority=None):
+        """Send an AHA request."""
+        plain = self._send_aha_request(cmd, ain, param, priority, self._request)
+        if self._is_write_command(cmd):
+            # cached entity lists are outdated after a command
+            self._listinfo_flight.forget()
+        return self._aha_response(plain, rf)
+
+    def _send_aha_request(self, cmd, ain, param, priority, request):
+        """Send an AHA request with request(url, params).
+
+        The request waits for the rate limiter, an expired session ID is
+        replaced and idempotent requests are retried.
+        """
+        (url, params) = self._aha_request_params(cmd, ain, param)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(*self._get_rate_limit(cmd, priority))
+        try:
+            result = request(url, params)
+        except exceptions.HTTPError as ex:
+            if not self._is_session_expired(ex):
+                raise
+            self._relogin(params["sid"])
+            if not self._is_idempotent(cmd, param):
+                raise
+            (url, params) = self._aha_request_params(cmd, ain, param)
+            result = request(url, params)
+        self._last_activity = time.monotonic()
+        return result
+
+    def _relogin(self, expired_sid):
+        """Login again, concurrent callers share one login."""
+        with self._login_lock:
+            if self._sid != expired_sid:
+                # another thread already did the login
+                return
+            _LOGGER.info("session expired, login again")
+            if self._sid_cache is not None:
+                self._sid_cache.remove_sid(self._host, self._user)
+            self.login()
+
+    def refresh_session(self):
+        """Refresh the session ID, login again if it already expired."""
+        sid = self._sid
+        if sid is None:
+            return
+        (checked_sid, _, _) = self._login_request(sid=sid)
+        if checked_sid == sid:
+            self._last_activity = time.monotonic()
+        else:
+            self._relogin(sid)
+
+    def _schedule_keepalive(self):
+        self._cancel_keepalive()
+        if self._keepalive_interval is None:
+            return
+        # check again when the session was idle for the interval, wait a
+        # whole interval if the last refresh failed
+        delay = self._last_activity + self._keepalive_interval - time.monotonic()
+        if delay <= 0:
+            delay = self._keepalive_interval
+        self._keepalive_timer = threading.Timer(delay, self._keepalive)
+        self._keepalive_timer.daemon = True
+        self._keepalive_timer.start()
+
+    def _cancel_keepalive(self):
+        if self._keepalive_timer is not None:
+            self._keepalive_timer.cancel()
+            self._keepalive_timer = None
+
+    def _keepalive(self):
+        try:
+            idle = time.monotonic() - self._last_activity
+            if idle >= self._keepalive_interval:
+                self.refresh_session()
+        except Exception:
+            _LOGGER.exception("session refresh failed")
+        if self._sid is not None:
+            self._schedule_keepalive()
+
+    def execute_many(self, commands, max_workers=4, wait=False):
+        """Send several AHA requests concurrently.
+
+        commands: iterable of (cmd, ain, param) tuples
+        max_workers: maximum number of concurrent requests
+        wait: wait for all devices to finish command execution
+
+        Return the results in the order of the commands. A failed command
+        returns the raised exception instead of a result.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+        max_workers = min(max_workers, len(commands))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._execute_command, commands))
+
+        if wait:
+            ains = [ain for (_, ain, _) in commands if ain]
+            self.wait_devices_txbusy(ains)
+        return results
+
+    def _execute_command(self, command):
+        (cmd, ain, param) = command
+        try:
+            return self._aha_request(cmd, ain=ain, param=param)
+        except Exception as ex:
+            return ex
+
+    def _get_cached_sid(self):
+        """Get the session ID from the session cache."""
+        if self._sid_cache is None:
+            return None
+        return self._sid_cache.get_sid(self._host, self._user)
+
+    def _accept_cached_sid(self, sid, checked_sid):
+        """Use the cached session ID if the Fritz!Box confirmed it."""
+        if checked_sid != sid:
+            _LOGGER.debug("cached sid expired")
+            self._sid_cache.remove_sid(self._host, self._user)
+            return False
+        self._sid = sid
+        return True
+
+    def _store_sid(self):
+        """Store the session ID in the session cache."""
+        if self._sid_cache is not None:
+            self._sid_cache.set_sid(self._host, self._user, self._sid)
+
     def login(self):
-        """Login and get a valid session ID."""
+        """Login and get a valid session ID.
+
+        With a session cache a cached session ID is validated first and
+        reused while the Fritz!Box still accepts it.
+        """
+        cached_sid = self._get_cached_sid()
+        if cached_sid:
+            (checked_sid, _, _) = self._login_request(sid=cached_sid)
+            if self._accept_cached_sid(cached_sid, checked_sid):
+                self._last_activity = time.monotonic()
+                self._schedule_keepalive()
+                return
+
         (sid, challenge, blocktime) = self._login_request()
         _LOGGER.info("sid:%s, challenge:%s, blocktime:%s", sid, challenge, blocktime)
         if sid == "0000000000000000":
             if blocktime > 0:
                 time.sleep(blocktime)
-            # PBKDF2 (FRITZ!OS 7.24 or later)
-            if challenge.startswith("2$"):
-                secret = self._create_login_secrete_pbkdf2(challenge, self._password)
-            # fallback to MD5
-            else:
-                secret = self._create_login_secret_md5(challenge, self._password)
-            (sid2, challenge, _) = self._login_request(
+            secret = self._create_login_secret(challenge)
+            (sid2, challenge, blocktime) = self._login_request(
                 username=self._user, secret=secret
             )
+            if sid2 == "0000000000000000" and self._forget_cached_pbkdf2_hash():
+                if blocktime > 0:
+                    time.sleep(blocktime)
+                secret = self._create_login_secret(challenge)
+                (sid2, challenge, _) = self._login_request(
+                    username=self._user, secret=secret
+                )
             if sid2 == "0000000000000000":
                 _LOGGER.warning("login failed %s", sid2)
+                self._forget_pbkdf2_static_hashes()
                 raise LoginError(self._user)
             self._sid = sid2
+            self._store_sid()
+            self._last_activity = time.monotonic()
+            self._schedule_keepalive()
+
+    def is_logged_in(self):
+        """Check if the client has a session ID.
+
+        The Fritz!Box can still reject it, e.g. after an idle timeout.
+        """
+        return self._sid is not None
 
     def logout(self):
         """Logout."""
+        self._cancel_keepalive()
         self._logout_request()
         self._sid = None
+        if self._sid_cache is not None:
+            self._sid_cache.remove_sid(self._host, self._user)
 
     def get_prefixed_host(self):
         """Choose the correct protocol prefix for the host.
@@ -166,39 +589,282 @@ class Fritzhome(object):
         else:
             return "http://" + host
 
-    def update_devices(self, ignore_removed=True):
-        """Update the device."""
+    def update_devices(self, ignore_removed=True, stream=False, fields=None):
+        """Update the device.
+
+        With ``stream`` the device list is parsed incrementally from the
+        raw response bytes and each device is updated as soon as its
+        element is complete, so only one device element is kept in memory.
+
+        With ``fields`` like ``{"power", "energy"}`` only the sections of
+        these attributes and the base values like ``name`` and ``present``
+        are decoded. The other attributes keep their previous values, or
+        their defaults for new devices.
+
+        Return the ``ChangeSet`` with the added, updated and removed devices.
+        """
         _LOGGER.info("Updating Devices ...")
+        if fields is not None:
+            fields = get_projection(fields)
+        digests = None
+        if stream:
+            device_elements = self._iter_listinfo_elements("device")
+        else:
+            listinfo = self._get_listinfo("device")
+            if fields is None:
+                if self._is_devicelist_unchanged(listinfo.plain, ignore_removed):
+                    return self._get_unchanged_devices()
+                digests = self._get_device_digests(listinfo.plain)
+            device_elements = listinfo.elements()
+        return self._update_devices_from_elements(
+            device_elements, ignore_removed, fields, digests
+        )
+
+    @staticmethod
+    def _digest(data):
+        """Return a short digest of the data."""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _is_devicelist_unchanged(self, plain, ignore_removed=True):
+        """Check if the device list response equals the previous one.
+
+        A list still has to be processed if missing devices are removed.
+        """
+        if not self._skip_unchanged:
+            return False
+
+        digest = self._digest(plain.encode("utf-8"))
+        unchanged = digest == self._devicelist_digest and self._devices is not None
+        self._devicelist_digest = digest
+        if not unchanged or (not ignore_removed and self._tombstones["device"]):
+            return False
+        _LOGGER.debug("device list unchanged")
+        return True
+
+    def _get_unchanged_devices(self):
+        """Get the change set of an unchanged device list."""
+        changes = ChangeSet()
+        missing = self._tombstones["device"].keys()
+        changes.unchanged.update(self._devices.keys() - missing)
+        changes.missing.update(missing)
+        self._update_counters["skipped"] += len(changes.unchanged)
+        return changes
+
+    def _get_device_digests(self, plain):
+        """Get the digests of the raw device elements by their identifier."""
+        if not self._skip_unchanged:
+            return None
+        return {
+            match.group(2): self._digest(match.group(0).encode("utf-8"))
+            for match in _DEVICE_TEXT.finditer(plain)
+        }
+
+    def _is_device_unchanged(self, digests, identifier, element):
+        """Check if the raw device element equals the previous one."""
+        digest = digests.get(identifier)
+        if digest is None:
+            self._device_digests.pop(identifier, None)
+            return False
+        if self._device_digests.get(identifier) == digest:
+            return True
+        self._device_digests[identifier] = digest
+        return False
+
+    def subscribe(self, ain, name, callback):
+        """Subscribe to the changes of an attribute value.
+
+        The callback is called with an ``AttributeChange`` when an update
+        changes the value of the attribute. With ``ain`` or ``name`` set to
+        None all entities or attributes are matched. Button presses are
+        reported as ``last_pressed`` changes of the button AIN.
+
+        Return a function to unsubscribe.
+        """
+        if self._lazy_devices and self._devices:
+            if ain is None:
+                devices = self._devices.values()
+            else:
+                devices = [self._devices[ain]] if ain in self._devices else []
+            for device in devices:
+                device.watch(name)
+        return self._subscriptions.subscribe(ain, name, callback)
+
+    def get_update_counters(self):
+        """Get the number of skipped and parsed device updates."""
+        return dict(self._update_counters)
+
+    def _update_devices_from_elements(
+        self, device_elements, ignore_removed=True, fields=None, digests=None
+    ):
+        """Update the known devices from the device list elements.
+
+        ``digests`` maps the identifiers to the digests of the raw device
+        elements, unchanged devices are skipped then.
+        """
         if self._devices is None:
             self._devices = {}
 
-        device_elements = self.get_device_elements()
-        for element in device_elements:
-            if element.attrib["identifier"] in self._devices.keys():
-                _LOGGER.info(
-                    "Updating already existing Device " + element.attrib["identifier"]
-                )
-                self._devices[element.attrib["identifier"]]._update_from_node(element)
-            else:
-                _LOGGER.info("Adding new Device " + element.attrib["identifier"])
-                device = FritzhomeDevice(self, node=element)
-                self._devices[device.ain] = device
-
-        if not ignore_removed:
-            for identifier in list(self._devices.keys()):
-                if identifier not in [
-                    element.attrib["identifier"] for element in device_elements
-                ]:
-                    _LOGGER.info("Removing no more existing device " + identifier)
-                    self._devices.pop(identifier)
+        is_unchanged = None
+        if digests is not None:
+            is_unchanged = functools.partial(self._is_device_unchanged, digests)
+        else:
+            # the devices of a streamed or a partly decoded list must be
+            # parsed again by the next update
+            self._devicelist_digest = None
+        changes = reconcile(
+            self._devices,
+            device_elements,
+            lambda element: self._create_device(element, fields),
+            lambda device, element: self._update_device(device, element, fields),
+            ignore_removed=ignore_removed,
+            tombstones=self._tombstones["device"],
+            is_unchanged=is_unchanged,
+            snapshot=self._get_entity_values,
+            kind="Device",
+        )
+        self._update_counters["skipped"] += len(changes.unchanged)
+        self._update_counters["parsed"] += len(changes.added) + len(changes.updated)
+        for identifier in changes.removed:
+            self._device_digests.pop(identifier, None)
+        if digests is None:
+            for identifier in changes.added | changes.updated:
+                self._device_digests.pop(identifier, None)
+        self._indexes.update_devices(self._devices, changes)
+        self._subscriptions.notify(changes)
+        return changes
+
+    def _update_device(self, device, element, fields=None):
+        """Update the device, replace it if its class changed."""
+        if self._is_class_changed(device, element):
+            return self._create_device(element, fields)
+        device._update_from_node(element, fields)
+        return device
 
-        return True
+    @staticmethod
+    def _get_entity_values(entity):
+        """Get the attribute values to compare before and after an update.
+
+        The buttons are rebuilt on every update, so their values are
+        compared by their own AIN.
+        """
+        values = entity._get_values()
+        snapshot = {entity.ain: values}
+        buttons = values.pop("buttons", None)
+        if buttons:
+            for button in buttons.values():
+                snapshot[button.ain] = button._get_values()
+        return snapshot
+
+    @staticmethod
+    def _update_entity(entity, element):
+        """Update the entity from its list element."""
+        entity._update_from_node(element)
+        return entity
+
+    def expire_removed(self, max_age):
+        """Remove the entities missing in the lists for max_age seconds.
+
+        Entities missing in an update with ``ignore_removed`` are kept
+        with a tombstone. Return the set of the removed identifiers.
+        """
+        removed = set()
+        for (kind, entities) in (
+            ("device", self._devices),
+            ("template", self._templates),
+            ("trigger", self._triggers),
+        ):
+            if entities is not None:
+                removed |= expire(entities, self._tombstones[kind], max_age)
+        for identifier in removed:
+            self._device_digests.pop(identifier, None)
+            self._indexes.remove_device(identifier)
+            self._indexes.remove_template(identifier)
+        return removed
+
+    def _create_device(self, element, fields=None):
+        """Create the device object of a device list element."""
+        if self._lazy_devices:
+            device = FritzhomeLazyDevice(self)
+            identifier = element.attrib["identifier"]
+            for (ain, name) in self._subscriptions.get_keys():
+                if ain is None or ain == identifier:
+                    device.watch(name)
+        elif self._compact_devices:
+            device = FritzhomeDeviceView(self)
+        elif self._specialized_devices:
+            device = get_device_class(int(element.attrib["functionbitmask"]))(self)
+        else:
+            device = FritzhomeDevice(self)
+        device._update_from_node(element, fields)
+        return device
+
+    def _is_class_changed(self, device, element):
+        """Check if the device needs another specialized class."""
+        return self._specialized_devices and (
+            device._functionsbitmask != int(element.attrib["functionbitmask"])
+        )
+
+    def _get_listinfo(self, entity_type, max_age=None):
+        """Get the entity list, shared with concurrent callers."""
+        if max_age is None:
+            max_age = self._listinfo_max_age
+        return self._listinfo_flight.do(
+            entity_type,
+            lambda: _ListInfo(self._aha_request("get" + entity_type + "listinfos")),
+            max_age,
+        )
 
     def _get_listinfo_elements(self, entity_type):
         """Get the DOM elements for the entity list."""
-        plain = self._aha_request("get" + entity_type + "listinfos")
+        return self._get_listinfo(entity_type).elements()
+
+    def _iter_listinfo_elements(self, entity_type):
+        """Iterate over the DOM elements of the streamed entity list.
+
+        The elements are cleared after they were handed out and must not
+        be used after advancing the iterator.
+        """
+        chunks = self._send_aha_request(
+            "get" + entity_type + "listinfos", None, None, None, self._open_stream
+        )
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        head = b""
+        root = None
+        depth = 0
+        try:
+            for chunk in chunks:
+                if len(head) < 16:
+                    head += chunk[:16]
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth == 1:
+                            root = element
+                        continue
+                    depth -= 1
+                    if depth == 1:
+                        yield element
+                        element.clear()
+                        root.remove(element)
+            parser.close()
+        except ElementTree.ParseError:
+            if head.strip().startswith(b"inval"):
+                raise InvalidError
+            raise
+
+    def _open_stream(self, url, params):
+        """Start the streamed request, raise the HTTP errors right away."""
+        chunks = self._request_stream(url, params)
+        first = next(chunks, b"")
+        return itertools.chain((first,), chunks)
+
+    @staticmethod
+    def _parse_listinfo_elements(plain):
+        """Parse the DOM elements of an entity list response."""
         dom = ElementTree.fromstring(plain)
-        _LOGGER.debug(dom)
+        if tracing.capture_xml:
+            tracing.trace_xml(_LOGGER, dom)
         return dom.findall("*")
 
     def wait_device_txbusy(self, ain, retries=10):
@@ -217,27 +883,93 @@ class Fritzhome(object):
                     self._has_getdeviceinfos = False
 
             if not self._has_getdeviceinfos:
-                dom = self.get_device_element(ain)
-
-            txbusy = dom.findall("txbusy")
-            if not txbusy:
-                # txbusy was added in FritzOS 7.20
-                self._has_txbusy = False
-                return True
+                # never use a cached list while polling
+                elements = self._get_listinfo("device", max_age=0).elements()
+                dom = self._find_element(elements, ain)
 
-            if txbusy[0].text == "0":
+            if self._is_txbusy_done(dom):
                 return True
 
             time.sleep(0.2)
         return False
 
+    def wait_devices_txbusy(
+        self, ains, timeout=5.0, interval=0.2, backoff=1.5, max_interval=2.0
+    ):
+        """Wait for several devices to finish command execution.
+
+        All pending devices are checked with one device list request per
+        round, or with getdeviceinfos if only a few devices are left. The
+        delay between the rounds starts with ``interval`` and grows by
+        ``backoff`` up to ``max_interval``.
+
+        Return the set of AINs which are still busy after the timeout.
+        """
+        pending = set(ains)
+        deadline = time.monotonic() + timeout
+        delay = interval
+        while pending and self._has_txbusy:
+            if self._has_getdeviceinfos and len(pending) <= self._TXBUSY_FEW_DEVICES:
+                self._check_txbusy_devices(pending)
+            else:
+                # never use a cached list while polling
+                elements = self._get_listinfo("device", max_age=0).elements()
+                self._check_txbusy_elements(pending, elements)
+
+            if not pending or not self._has_txbusy:
+                break
+            if time.monotonic() + delay > deadline:
+                return pending
+            time.sleep(delay)
+            delay = min(delay * backoff, max_interval)
+        return set()
+
+    def _check_txbusy_devices(self, pending):
+        """Remove the devices which are not busy anymore from pending."""
+        for ain in list(pending):
+            try:
+                # getdeviceinfos was added in FritzOS 7.24
+                dom = ElementTree.fromstring(self.get_device_infos(ain))
+            except exceptions.HTTPError:
+                _LOGGER.debug("fallback to getdevicelistinfos")
+                self._has_getdeviceinfos = False
+                return
+            if self._is_txbusy_done(dom):
+                pending.discard(ain)
+
+    def _check_txbusy_elements(self, pending, elements):
+        """Remove the list elements which are not busy anymore from pending."""
+        found = set()
+        for element in elements:
+            ain = element.attrib["identifier"]
+            if ain in pending:
+                found.add(ain)
+                if self._is_txbusy_done(element):
+                    pending.discard(ain)
+        # unknown devices can't be busy
+        pending.intersection_update(found)
+
+    def _is_txbusy_done(self, dom):
+        """Check if the device of the DOM element finished its command."""
+        txbusy = dom.findall("txbusy")
+        if not txbusy:
+            # txbusy was added in FritzOS 7.20
+            self._has_txbusy = False
+            return True
+
+        return txbusy[0].text == "0"
+
     def get_device_elements(self):
         """Get the DOM elements for the device list."""
         return self._get_listinfo_elements("device")
 
     def get_device_element(self, ain):
         """Get the DOM element for the specified device."""
-        elements = self.get_device_elements()
+        return self._find_element(self.get_device_elements(), ain)
+
+    @staticmethod
+    def _find_element(elements, ain):
+        """Find the element with the specified identifier."""
         for element in elements:
             if element.attrib["identifier"] == ain:
                 return element
@@ -257,6 +989,50 @@ class Fritzhome(object):
         """Return a device specified by the AIN."""
         return self.get_devices_as_dict()[ain]
 
+    def _get_known_devices(self, ains):
+        devices = self._devices or {}
+        return [devices[ain] for ain in ains if ain in devices]
+
+    def get_devices_by_name(self, name):
+        """Get the known devices with the name."""
+        return self._get_known_devices(self._indexes.get_by_name(name))
+
+    def get_device_by_id(self, identifier):
+        """Return a known device specified by its id."""
+        ain = self._indexes.get_by_id(str(identifier))
+        if ain is None:
+            raise KeyError(identifier)
+        return self._devices[ain]
+
+    def get_devices_by_product(self, productname):
+        """Get the known devices with the product name."""
+        return self._get_known_devices(self._indexes.get_by_product(productname))
+
+    def get_devices_by_feature(self, feature):
+        """Get the known devices with the FritzhomeDeviceFeatures feature."""
+        return self._get_known_devices(self._indexes.get_by_feature(feature))
+
+    def get_group_members(self, ain):
+        """Get the known member devices of the group."""
+        return self._get_known_devices(self._indexes.get_group_members(ain))
+
+    def get_device_groups(self, ain):
+        """Get the known groups containing the device."""
+        return self._get_known_devices(self._indexes.get_member_groups(ain))
+
+    def get_template_devices(self, ain):
+        """Get the known devices of the template."""
+        return self._get_known_devices(self._indexes.get_template_devices(ain))
+
+    def get_device_templates(self, ain):
+        """Get the known templates containing the device."""
+        templates = self._templates or {}
+        return [
+            templates[template]
+            for template in self._indexes.get_device_templates(ain)
+            if template in templates
+        ]
+
     def get_device_infos(self, ain):
         """Get the device infos."""
         return self._aha_request("getdeviceinfos", ain=ain)
@@ -311,14 +1087,20 @@ class Fritzhome(object):
         """Get the thermostate target temperature."""
         return self._get_temperature(ain, "gethkrtsoll")
 
-    def set_target_temperature(self, ain, temperature, wait=False):
-        """Set the thermostate target temperature."""
+    @staticmethod
+    def _target_temperature_param(temperature):
+        """Convert the temperature into the sethkrtsoll parameter."""
         temp = int(temperature * 2)
 
         if temp < 16:
             temp = 253
         elif temp > 56:
             temp = 254
+        return temp
+
+    def set_target_temperature(self, ain, temperature, wait=False):
+        """Set the thermostate target temperature."""
+        temp = self._target_temperature_param(temperature)
 
         self._aha_request("sethkrtsoll", ain=ain, param={"param": temp})
         wait and self.wait_device_txbusy(ain)
@@ -349,9 +1131,68 @@ class Fritzhome(object):
 
     def get_device_statistics(self, ain):
         """Get device statistics."""
+        if self._stats_cache is not None:
+            return self._get_cached_device_stats(ain)[0]
         plain = self._aha_request("getbasicdevicestats", ain=ain)
         return plain
 
+    def get_device_stats(self, ain):
+        """Get the parsed device statistics as ``FritzhomeDeviceStats``."""
+        if self._stats_cache is not None:
+            return self._get_cached_device_stats(ain)[1]
+        return FritzhomeDeviceStats.from_xml(self.get_device_statistics(ain))
+
+    def _get_cached_device_stats(self, ain):
+        """Get the (plain, stats) from the cache, fetch them if expired."""
+        entry = self._stats_cache.get(ain)
+        if entry is None:
+            plain = self._aha_request("getbasicdevicestats", ain=ain)
+            entry = self._stats_cache.set(ain, plain)
+        return entry
+
+    def get_all_device_statistics(self, ains=None, max_workers=4):
+        """Get the parsed statistics of several devices concurrently.
+
+        ains: AINs of the devices, all devices with temperature, humidity
+              or power meter statistics if not set
+        max_workers: maximum number of concurrent requests
+
+        Return a dictionary of the AINs and their ``FritzhomeDeviceStats``.
+        A failed device maps to the raised exception instead.
+        """
+        if ains is None:
+            ains = self._get_statistics_ains(self.get_devices())
+        ains = list(ains)
+        if not ains:
+            return {}
+        max_workers = min(max_workers, len(ains))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._get_device_stats_or_error, ains))
+        return dict(zip(ains, results))
+
+    @staticmethod
+    def _get_statistics_ains(devices):
+        """Get the AINs of the devices with statistics."""
+        return [
+            device.ain
+            for device in devices
+            if device.has_temperature_sensor
+            or device.has_humidity_sensor
+            or device.has_powermeter
+        ]
+
+    def _get_device_stats_or_error(self, ain):
+        try:
+            return self.get_device_stats(ain)
+        except Exception as ex:
+            return ex
+
+    def invalidate_device_stats(self, ain=None):
+        """Remove the cached statistics of the device, or of all devices."""
+        if self._stats_cache is not None:
+            self._stats_cache.invalidate(ain)
+
     # Lightbulb-related commands
 
     def set_state_off(self, ain, wait=False):
@@ -395,7 +1236,11 @@ class Fritzhome(object):
 
     def get_colors(self, ain):
         """Get colors (HSV-space) supported by this lightbulb."""
-        colordefaults = self._get_colordefaults(ain)
+        return self._parse_colors(self._get_colordefaults(ain))
+
+    @staticmethod
+    def _parse_colors(colordefaults):
+        """Extract the colors from the color defaults."""
         colors = {}
         for hs in colordefaults.iter("hs"):
             name = hs.find("name").text.strip()
@@ -425,7 +1270,11 @@ class Fritzhome(object):
 
     def get_color_temps(self, ain):
         """Get temperatures supported by this lightbulb."""
-        colordefaults = self._get_colordefaults(ain)
+        return self._parse_color_temps(self._get_colordefaults(ain))
+
+    @staticmethod
+    def _parse_color_temps(colordefaults):
+        """Extract the color temperatures from the color defaults."""
         temperatures = []
         for temp in colordefaults.iter("temp"):
             temperatures.append(temp.get("value"))
@@ -466,6 +1315,11 @@ class Fritzhome(object):
     def has_templates(self):
         """Check if the Fritz!Box supports smarthome templates."""
         plain = self._aha_request("gettemplatelistinfos")
+        return self._is_xml(plain)
+
+    @staticmethod
+    def _is_xml(plain):
+        """Check if the response is a valid XML document."""
         try:
             ElementTree.fromstring(plain)
         except ElementTree.ParseError:
@@ -473,32 +1327,29 @@ class Fritzhome(object):
         return True
 
     def update_templates(self, ignore_removed=True):
-        """Update the template."""
+        """Update the template, return the ``ChangeSet``."""
         _LOGGER.info("Updating Templates ...")
+        template_elements = self.get_template_elements()
+        return self._update_templates_from_elements(template_elements, ignore_removed)
+
+    def _update_templates_from_elements(self, template_elements, ignore_removed=True):
+        """Update the known templates from the template list elements."""
         if self._templates is None:
             self._templates = {}
 
-        template_elements = self.get_template_elements()
-        for element in template_elements:
-            if element.attrib["identifier"] in self._templates.keys():
-                _LOGGER.info(
-                    "Updating already existing Template " + element.attrib["identifier"]
-                )
-                self._templates[element.attrib["identifier"]]._update_from_node(element)
-            else:
-                _LOGGER.info("Adding new Template " + element.attrib["identifier"])
-                template = FritzhomeTemplate(self, node=element)
-                self._templates[template.ain] = template
-
-        if not ignore_removed:
-            for identifier in list(self._templates.keys()):
-                if identifier not in [
-                    element.attrib["identifier"] for element in template_elements
-                ]:
-                    _LOGGER.info("Removing no more existing template " + identifier)
-                    self._templates.pop(identifier)
-
-        return True
+        changes = reconcile(
+            self._templates,
+            template_elements,
+            lambda element: FritzhomeTemplate(self, node=element),
+            self._update_entity,
+            ignore_removed=ignore_removed,
+            tombstones=self._tombstones["template"],
+            snapshot=self._get_entity_values,
+            kind="Template",
+        )
+        self._indexes.update_templates(self._templates, changes)
+        self._subscriptions.notify(changes)
+        return changes
 
     def get_template_elements(self):
         """Get the DOM elements for the template list."""
@@ -527,39 +1378,31 @@ class Fritzhome(object):
     def has_triggers(self):
         """Check if the Fritz!Box supports smarthome triggers."""
         plain = self._aha_request("gettriggerlistinfos")
-        try:
-            ElementTree.fromstring(plain)
-        except ElementTree.ParseError:
-            return False
-        return True
+        return self._is_xml(plain)
 
     def update_triggers(self, ignore_removed=True):
-        """Update the triger."""
+        """Update the triger, return the ``ChangeSet``."""
         _LOGGER.info("Updating Trigers ...")
+        trigger_elements = self.get_trigger_elements()
+        return self._update_triggers_from_elements(trigger_elements, ignore_removed)
+
+    def _update_triggers_from_elements(self, trigger_elements, ignore_removed=True):
+        """Update the known triggers from the trigger list elements."""
         if self._triggers is None:
             self._triggers = {}
 
-        trigger_elements = self.get_trigger_elements()
-        for element in trigger_elements:
-            if element.attrib["identifier"] in self._triggers.keys():
-                _LOGGER.info(
-                    "Updating already existing Trigger " + element.attrib["identifier"]
-                )
-                self._triggers[element.attrib["identifier"]]._update_from_node(element)
-            else:
-                _LOGGER.info("Adding new Trigger " + element.attrib["identifier"])
-                trigger = FritzhomeTrigger(self, node=element)
-                self._triggers[trigger.ain] = trigger
-
-        if not ignore_removed:
-            for identifier in list(self._triggers.keys()):
-                if identifier not in [
-                    element.attrib["identifier"] for element in trigger_elements
-                ]:
-                    _LOGGER.info("Removing no more existing trigger " + identifier)
-                    self._triggers.pop(identifier)
-
-        return True
+        changes = reconcile(
+            self._triggers,
+            trigger_elements,
+            lambda element: FritzhomeTrigger(self, node=element),
+            self._update_entity,
+            ignore_removed=ignore_removed,
+            tombstones=self._tombstones["trigger"],
+            snapshot=self._get_entity_values,
+            kind="Trigger",
+        )
+        self._subscriptions.notify(changes)
+        return changes
 
     def get_trigger_elements(self):
         """Get the DOM elements for the trigger list."""
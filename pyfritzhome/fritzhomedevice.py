@@ -2,6 +2,10 @@
 
 # -*- coding: utf-8 -*-
 
+import logging
+from typing import Dict
+
+from . import tracing
 from .devicetypes import FritzhomeTemplate  # noqa: F401
 from .devicetypes import FritzhomeTrigger  # noqa: F401
 from .devicetypes import (
@@ -17,6 +21,11 @@ from .devicetypes import (
     FritzhomeDeviceTemperature,
     FritzhomeDeviceThermostat,
 )
+from .devicetypes.fritzhomedevicebase import FritzhomeDeviceBase
+from .devicetypes.fritzhomedeviceprofile import FritzhomeDeviceProfile
+from .devicetypes.fritzhomeentitybase import FritzhomeEntityBase
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class FritzhomeDevice(
@@ -32,11 +41,213 @@ class FritzhomeDevice(
     FritzhomeDeviceTemperature,
     FritzhomeDeviceThermostat,
 ):
-    """The Fritzhome Device class."""
+    """The Fritzhome Device class.
+
+    The device element is parsed in a single pass over its children. The
+    section decoders are called as listed in the parse plan of the
+    capability profile, only the sections of the ``fields`` are decoded
+    if they are set.
+    """
 
     def __init__(self, fritz=None, node=None):
         """Create a device object."""
         super().__init__(fritz, node)
 
-    def _update_from_node(self, node):
-        super()._update_from_node(node)
+    @staticmethod
+    def _get_children(node):
+        """Map the tags to the first child elements, and to all buttons."""
+        children = {}
+        buttons = []
+        for child in node:
+            tag = child.tag
+            if tag == "button":
+                buttons.append(child)
+            elif tag not in children:
+                children[tag] = child
+        children["button"] = buttons
+        return children
+
+    # a new section needs its decoder in FritzhomeDeviceProfile.parse_plan
+    def _update_from_node(self, node, fields=None):
+        if tracing.capture_xml:
+            tracing.trace_xml(_LOGGER, node)
+        children = self._get_children(node)
+
+        self._update_entity_from_node(node, self._get_child_text(children, "name"))
+        self._update_base_from_children(node, children)
+        if self.present is False:
+            return
+
+        for (update, tag) in get_parse_plan(self._profile, fields):
+            getattr(self, update)(children.get(tag))
+
+
+_DEVICE_TYPES = (
+    ("has_alarm", FritzhomeDeviceAlarm),
+    ("has_blind", FritzhomeDeviceBlind),
+    ("has_button", FritzhomeDeviceButton),
+    ("has_humidity_sensor", FritzhomeDeviceHumidity),
+    ("has_level", FritzhomeDeviceLevel),
+    ("has_lightbulb", FritzhomeDeviceLightBulb),
+    ("has_powermeter", FritzhomeDevicePowermeter),
+    ("has_repeater", FritzhomeDeviceRepeater),
+    ("has_switch", FritzhomeDeviceSwitch),
+    ("has_temperature_sensor", FritzhomeDeviceTemperature),
+    ("has_thermostat", FritzhomeDeviceThermostat),
+)
+
+_device_classes: Dict[int, type] = {}
+
+_NO_DEFAULT = object()
+
+
+def _get_device_types(profile):
+    """Get the device type classes needed for the capability profile."""
+    bases = [base for (has, base) in _DEVICE_TYPES if getattr(profile, has)]
+    return bases or [FritzhomeDeviceBase]
+
+
+def _collect_fields(bases):
+    """Collect the instance fields with their defaults of the classes."""
+    fields: Dict[str, object] = {}
+    for base in bases:
+        for cls in reversed(base.__mro__):
+            for name in getattr(cls, "__annotations__", {}):
+                fields.setdefault(name, _NO_DEFAULT)
+            for (name, value) in vars(cls).items():
+                if (
+                    name.startswith(("__", "_abc_"))
+                    or name.lstrip("_").isupper()
+                    or callable(value)
+                    or isinstance(value, (property, staticmethod, classmethod))
+                ):
+                    continue
+                fields[name] = value
+    return fields
+
+
+def _get_slot_values(obj):
+    """Get the public values stored in the slots of the object."""
+    return {
+        name: getattr(obj, name, None)
+        for name in type(obj).__slots__
+        if not name.startswith("_")
+    }
+
+
+def _get_sections():
+    """Map the section decoders and the fields to the device type classes."""
+    base_fields = _collect_fields([FritzhomeDeviceBase])
+    decoders = {}
+    fields = {}
+    for (_, section) in _DEVICE_TYPES:
+        for name in vars(section):
+            if name.startswith("_update_") and name.endswith(("_element", "_elements")):
+                decoders[name] = section
+        for (name, default) in _collect_fields([section]).items():
+            if name not in base_fields:
+                (sections, _) = fields.get(name, ((), default))
+                fields[name] = (sections + (section,), default)
+    return (base_fields, decoders, fields)
+
+
+(_BASE_FIELDS, _DECODER_SECTIONS, _SECTION_FIELDS) = _get_sections()
+
+_projected_plans: Dict[tuple, tuple] = {}
+
+
+def get_projection(fields):
+    """Get the projection decoding the fields as frozenset.
+
+    The base values like ``name`` and ``present`` are always decoded.
+    Raise ValueError for unknown fields.
+    """
+    projection = frozenset(fields)
+    unknown = projection - _BASE_FIELDS.keys() - _SECTION_FIELDS.keys()
+    if unknown:
+        raise ValueError("unknown fields: {0}".format(", ".join(sorted(unknown))))
+    return projection
+
+
+def get_parse_plan(profile, fields=None):
+    """Get the parse plan of the profile decoding only the fields if set."""
+    if fields is None:
+        return profile.parse_plan
+    key = (profile.functionsbitmask, fields)
+    plan = _projected_plans.get(key)
+    if plan is None:
+        sections = set()
+        for name in fields:
+            sections.update(_SECTION_FIELDS.get(name, ((), None))[0])
+        plan = tuple(
+            (update, tag)
+            for (update, tag) in profile.parse_plan
+            if _DECODER_SECTIONS[update] in sections
+        )
+        plan = _projected_plans.setdefault(key, plan)
+    return plan
+
+
+class _SpecializedDevice(object):
+    """Behaviour shared by the specialized device classes."""
+
+    __slots__ = ()
+    _defaults: tuple = ()
+
+    def __init__(self, fritz=None, node=None):
+        """Create a device object."""
+        for (name, value) in self._defaults:
+            setattr(self, name, value)
+        FritzhomeEntityBase.__init__(self, fritz, node)
+
+    _get_values = _get_slot_values
+
+    def __getattr__(self, name):
+        """Fall back to the attributes of the other device types."""
+        try:
+            value = getattr(FritzhomeDevice, name)
+        except AttributeError:
+            raise AttributeError(
+                "'{0}' object has no attribute '{1}'".format(type(self).__name__, name)
+            ) from None
+        if hasattr(value, "__get__"):
+            return value.__get__(self, type(self))
+        return value
+
+
+def get_device_class(functionsbitmask):
+    """Get the device class specialized for the function bitmask.
+
+    The class only contains the device types needed for the capabilities
+    and stores its values in ``__slots__``. Attributes of the other device
+    types are looked up on ``FritzhomeDevice``, and the class is
+    registered as virtual subclass of ``FritzhomeDevice``.
+    """
+    cls = _device_classes.get(functionsbitmask)
+    if cls is not None:
+        return cls
+
+    profile = FritzhomeDeviceProfile.get(functionsbitmask)
+    bases = _get_device_types(profile)
+    fields = _collect_fields(bases)
+    defaults = list(fields.items())
+    namespace = {
+        "__doc__": "The Fritzhome Device class for {0!r}.".format(profile),
+        "__slots__": tuple(fields),
+        "_defaults": tuple(item for item in defaults if item[1] is not _NO_DEFAULT),
+        "_get_children": FritzhomeDevice.__dict__["_get_children"],
+        "_update_from_node": FritzhomeDevice.__dict__["_update_from_node"],
+    }
+    cls = type(
+        "FritzhomeDevice{0}".format(functionsbitmask),
+        (_SpecializedDevice, *bases),
+        namespace,
+    )
+    FritzhomeDevice.register(cls)
+    return _device_classes.setdefault(functionsbitmask, cls)
+
+
+def create_device(fritz, node):
+    """Create a device object of the class specialized for the node."""
+    cls = get_device_class(int(node.attrib["functionbitmask"]))
+    return cls(fritz, node)
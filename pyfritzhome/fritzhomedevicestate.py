@@ -0,0 +1,132 @@
+"""Compact device state for large device registries."""
+# -*- coding: utf-8 -*-
+
+from typing import Dict
+
+from .devicetypes.fritzhomedeviceprofile import FritzhomeDeviceProfile
+from .fritzhomedevice import (
+    _NO_DEFAULT,
+    FritzhomeDevice,
+    _collect_fields,
+    _get_device_types,
+    _get_slot_values,
+)
+
+_state_classes: Dict[int, type] = {}
+
+
+class FritzhomeDeviceState(object):
+    """The decoded values of a device.
+
+    A state only stores the values of the device types of its function
+    bitmask in ``__slots__``, it has no reference to the ``Fritzhome``
+    object. Use ``get_class()`` to get the state class of a function
+    bitmask and ``view()`` to use the ``FritzhomeDevice`` API.
+    """
+
+    __slots__ = ()
+    functionsbitmask = 0
+    _defaults: tuple = ()
+
+    def __init__(self):
+        """Create a state with the default values."""
+        for (name, value) in self._defaults:
+            setattr(self, name, value)
+
+    def __repr__(self):
+        """Return a string."""
+        return "{0}({1})".format(type(self).__name__, getattr(self, "ain", None))
+
+    _get_values = _get_slot_values
+
+    @staticmethod
+    def get_class(functionsbitmask):
+        """Get the state class of the function bitmask."""
+        cls = _state_classes.get(functionsbitmask)
+        if cls is not None:
+            return cls
+
+        profile = FritzhomeDeviceProfile.get(functionsbitmask)
+        fields = _collect_fields(_get_device_types(profile))
+        fields.pop("_fritz")
+        cls = type(
+            "FritzhomeDeviceState{0}".format(functionsbitmask),
+            (FritzhomeDeviceState,),
+            {
+                "__slots__": tuple(fields),
+                "functionsbitmask": functionsbitmask,
+                "_defaults": tuple(
+                    item for item in fields.items() if item[1] is not _NO_DEFAULT
+                ),
+            },
+        )
+        return _state_classes.setdefault(functionsbitmask, cls)
+
+    @classmethod
+    def from_node(cls, node):
+        """Decode the state of a device element."""
+        return FritzhomeDeviceView(node=node).device_state
+
+    def view(self, fritz=None):
+        """Get a device object using this state."""
+        return FritzhomeDeviceView(fritz, state=self)
+
+
+def _state_property(name, default):
+    """Create a property reading and writing the value of the state."""
+
+    def fget(self):
+        try:
+            return getattr(self._state, name)
+        except AttributeError:
+            # the value of another device type
+            if default is _NO_DEFAULT:
+                raise
+            return default
+
+    def fset(self, value):
+        setattr(self._state, name, value)
+
+    return property(fget, fset)
+
+
+class FritzhomeDeviceView(FritzhomeDevice):
+    """A device object storing its values in a ``FritzhomeDeviceState``.
+
+    The view only holds the state and the ``Fritzhome`` object, so many
+    views can be created for the same state.
+    """
+
+    __slots__ = ("_state", "_fritz")
+
+    def __init__(self, fritz=None, node=None, state=None):
+        """Create a device view, decode the node into a new state if set."""
+        self._fritz = fritz
+        if state is None:
+            functionsbitmask = 0
+            if node is not None:
+                functionsbitmask = int(node.attrib["functionbitmask"])
+            state = FritzhomeDeviceState.get_class(functionsbitmask)()
+        self._state = state
+        if node is not None:
+            self._update_from_node(node)
+
+    @property
+    def device_state(self):
+        """Get the state record of the device."""
+        return self._state
+
+    def _get_values(self):
+        return self._state._get_values()
+
+    def _update_from_node(self, node, fields=None):
+        functionsbitmask = int(node.attrib["functionbitmask"])
+        if functionsbitmask != self._state.functionsbitmask:
+            # the device types changed, the state needs other fields
+            self._state = FritzhomeDeviceState.get_class(functionsbitmask)()
+        super()._update_from_node(node, fields)
+
+
+for (_name, _default) in _collect_fields([FritzhomeDevice]).items():
+    if _name != "_fritz":
+        setattr(FritzhomeDeviceView, _name, _state_property(_name, _default))
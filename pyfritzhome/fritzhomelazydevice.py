@@ -0,0 +1,117 @@
+"""Lazy decoding of the device values."""
+# -*- coding: utf-8 -*-
+
+import logging
+
+from . import tracing
+from .fritzhomedevice import (
+    _DECODER_SECTIONS,
+    _NO_DEFAULT,
+    _SECTION_FIELDS,
+    FritzhomeDevice,
+    get_parse_plan,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _LazyField(object):
+    """Decode the sections of the field on the first access."""
+
+    __slots__ = ("name", "sections", "default")
+
+    def __init__(self, name, sections, default):
+        self.name = name
+        self.sections = sections
+        self.default = default
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        values = obj.__dict__
+        if self.name not in values:
+            obj._decode_sections(self.sections)
+        try:
+            return values[self.name]
+        except KeyError:
+            if self.default is _NO_DEFAULT:
+                raise AttributeError(
+                    "'{0}' object has no attribute '{1}'".format(
+                        type(obj).__name__, self.name
+                    )
+                ) from None
+            return self.default
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+class FritzhomeLazyDevice(FritzhomeDevice):
+    """A device decoding its sections on the first access.
+
+    An update only decodes the base values like ``name`` and ``present``
+    and keeps the section elements of the device. The values of a section
+    like ``hkr`` or ``powermeter`` are decoded when one of them is read
+    and kept until the next update.
+
+    Only the decoded values are compared for the change sets. Sections of
+    watched attributes are decoded on every update, the subscribed
+    attributes are watched.
+    """
+
+    _pending: dict = {}
+    _watched: frozenset = frozenset()
+
+    def _update_from_node(self, node, fields=None):
+        if tracing.capture_xml:
+            tracing.trace_xml(_LOGGER, node)
+        children = self._get_children(node)
+
+        self._update_entity_from_node(node, self._get_child_text(children, "name"))
+        self._update_base_from_children(node, children)
+        if self.present is False:
+            return
+
+        pending = {}
+        for (update, tag) in get_parse_plan(self._profile, fields):
+            section = _DECODER_SECTIONS[update]
+            pending.setdefault(section, []).append((update, children.get(tag)))
+        values = self.__dict__
+        for name in values.keys() & _SECTION_FIELDS.keys():
+            if not pending.keys().isdisjoint(_SECTION_FIELDS[name][0]):
+                del values[name]
+        if fields is not None:
+            # the sections outside of the projection keep their values
+            for (section, updates) in self._pending.items():
+                pending.setdefault(section, updates)
+        self._pending = pending
+        if self._watched:
+            self._decode_sections(self._watched)
+
+    def _decode_sections(self, sections):
+        """Decode the pending sections."""
+        pending = self._pending
+        for section in [section for section in pending if section in sections]:
+            for (update, element) in pending.pop(section):
+                getattr(self, update)(element)
+
+    def watch(self, name=None):
+        """Decode the attribute on every update, all attributes without name."""
+        if name is None:
+            sections = frozenset(_DECODER_SECTIONS.values())
+        else:
+            (sections, _) = _SECTION_FIELDS.get(name, ((), None))
+        self._watched = self._watched | frozenset(sections)
+        self._decode_sections(self._watched)
+
+    def subscribe_button(self, ain, callback):
+        """Subscribe to the presses of a button.
+
+        Return a function to unsubscribe.
+        """
+        self.watch("buttons")
+        return super().subscribe_button(ain, callback)
+
+
+for (_name, (_sections, _default)) in _SECTION_FIELDS.items():
+    setattr(FritzhomeLazyDevice, _name, _LazyField(_name, _sections, _default))
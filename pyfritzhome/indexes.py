@@ -0,0 +1,145 @@
+"""Secondary indexes of the device and template registries."""
+# -*- coding: utf-8 -*-
+
+
+def _add(index, key, ain):
+    index.setdefault(key, set()).add(ain)
+
+
+def _discard(index, key, ain):
+    ains = index.get(key)
+    if ains is not None:
+        ains.discard(ain)
+        if not ains:
+            del index[key]
+
+
+class RegistryIndexes(object):
+    """Look up the AINs of the entities by their attributes.
+
+    The indexes are updated with the change sets of the updates, so only
+    the added, updated and removed entities are visited. The group members
+    are stored by their device ids like in ``group_members``.
+    """
+
+    def __init__(self):
+        """Create empty indexes."""
+        self._device_keys = {}
+        self._names = {}
+        self._ids = {}
+        self._products = {}
+        self._features = {}
+        self._group_members = {}
+        self._member_groups = {}
+        self._template_devices = {}
+        self._device_templates = {}
+
+    @staticmethod
+    def _get_device_keys(device):
+        return (
+            device.name,
+            device.identifier,
+            device.productname,
+            tuple(device.supported_features or ()),
+            tuple(device.group_members or ()) if device.is_group else (),
+        )
+
+    def update_devices(self, devices, changes):
+        """Index the added and updated devices, drop the removed devices."""
+        for ain in changes.removed:
+            self.remove_device(ain)
+        for ain in changes.added | changes.updated:
+            self._index_device(ain, devices[ain])
+
+    def _index_device(self, ain, device):
+        keys = self._get_device_keys(device)
+        old_keys = self._device_keys.get(ain)
+        if keys == old_keys:
+            return
+        if old_keys is not None:
+            self.remove_device(ain)
+
+        (name, identifier, productname, features, members) = keys
+        self._device_keys[ain] = keys
+        _add(self._names, name, ain)
+        self._ids[identifier] = ain
+        _add(self._products, productname, ain)
+        for feature in features:
+            _add(self._features, feature, ain)
+        if members:
+            self._group_members[ain] = members
+            for member in members:
+                _add(self._member_groups, member, ain)
+
+    def remove_device(self, ain):
+        """Drop the device from the indexes."""
+        keys = self._device_keys.pop(ain, None)
+        if keys is None:
+            return
+
+        (name, identifier, productname, features, members) = keys
+        _discard(self._names, name, ain)
+        if self._ids.get(identifier) == ain:
+            del self._ids[identifier]
+        _discard(self._products, productname, ain)
+        for feature in features:
+            _discard(self._features, feature, ain)
+        if members:
+            del self._group_members[ain]
+            for member in members:
+                _discard(self._member_groups, member, ain)
+
+    def update_templates(self, templates, changes):
+        """Index the added and updated templates, drop the removed ones."""
+        for ain in changes.removed:
+            self.remove_template(ain)
+        for ain in changes.added | changes.updated:
+            devices = tuple(templates[ain].devices)
+            if self._template_devices.get(ain) == devices:
+                continue
+            self.remove_template(ain)
+            self._template_devices[ain] = devices
+            for device in devices:
+                _add(self._device_templates, device, ain)
+
+    def remove_template(self, ain):
+        """Drop the template from the indexes."""
+        devices = self._template_devices.pop(ain, ())
+        for device in devices:
+            _discard(self._device_templates, device, ain)
+
+    def get_by_name(self, name):
+        """Get the AINs of the devices with the name."""
+        return self._names.get(name, set())
+
+    def get_by_id(self, identifier):
+        """Get the AIN of the device with the id or None."""
+        return self._ids.get(identifier)
+
+    def get_by_product(self, productname):
+        """Get the AINs of the devices with the product name."""
+        return self._products.get(productname, set())
+
+    def get_by_feature(self, feature):
+        """Get the AINs of the devices with the feature."""
+        return self._features.get(feature, set())
+
+    def get_group_members(self, ain):
+        """Get the AINs of the known members of the group."""
+        members = (self._ids.get(member) for member in self._group_members.get(ain, ()))
+        return [member for member in members if member is not None]
+
+    def get_member_groups(self, ain):
+        """Get the AINs of the groups containing the device."""
+        keys = self._device_keys.get(ain)
+        if keys is None:
+            return set()
+        return self._member_groups.get(keys[1], set())
+
+    def get_template_devices(self, ain):
+        """Get the AINs of the devices of the template."""
+        return self._template_devices.get(ain, ())
+
+    def get_device_templates(self, ain):
+        """Get the AINs of the templates containing the device."""
+        return self._device_templates.get(ain, set())
@@ -0,0 +1,135 @@
+"""Client side rate limiting of the requests to the Fritz!Box."""
+# -*- coding: utf-8 -*-
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+KIND_READ = "read"
+KIND_WRITE = "write"
+
+
+class TokenBucket(object):
+    """A token bucket refilled with a constant rate."""
+
+    def __init__(self, rate, burst=1):
+        """Create a bucket with rate tokens per second and burst capacity."""
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay(self):
+        """Get the seconds until a token is available."""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def take(self):
+        """Take a token, return False if none is available."""
+        if self.delay() > 0:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RateLimiter(object):
+    """Rate limiter with separate budgets for read and write requests.
+
+    Requests waiting for a token are served by priority, a lower value
+    means a higher priority. Requests with the same priority are served
+    in order of arrival.
+    """
+
+    def __init__(self, read_rate=10.0, write_rate=2.0, read_burst=5, write_burst=2):
+        """Create a rate limiter, the rates are requests per second."""
+        self._buckets = {
+            KIND_READ: TokenBucket(read_rate, read_burst),
+            KIND_WRITE: TokenBucket(write_rate, write_burst),
+        }
+        self._waiting = {KIND_READ: [], KIND_WRITE: []}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, kind, priority=PRIORITY_INTERACTIVE):
+        """Block until a request of the kind may be sent."""
+        bucket = self._buckets[kind]
+        queue = self._waiting[kind]
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(queue, entry)
+            # a waiting request with a lower priority has to step back
+            self._condition.notify_all()
+            try:
+                while True:
+                    delay = self._get_delay(bucket, queue, entry)
+                    if delay == 0:
+                        return
+                    self._condition.wait(delay)
+            finally:
+                queue.remove(entry)
+                heapq.heapify(queue)
+                self._condition.notify_all()
+
+    @staticmethod
+    def _get_delay(bucket, queue, entry):
+        """Take a token if the entry is first, otherwise return the delay.
+
+        The delay is None while other requests are waiting before the entry.
+        """
+        if queue[0] != entry:
+            return None
+        delay = bucket.delay()
+        if delay <= 0:
+            bucket.take()
+            return 0
+        return delay
+
+
+class AsyncRateLimiter(RateLimiter):
+    """Rate limiter for ``AsyncFritzhome`` waiting in the event loop.
+
+    The budgets and priorities are the same as for ``RateLimiter``, the
+    limiter must only be used in one event loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Create a rate limiter, the rates are requests per second."""
+        super().__init__(*args, **kwargs)
+        self._async_condition = None
+
+    async def acquire(self, kind, priority=PRIORITY_INTERACTIVE):
+        """Wait until a request of the kind may be sent."""
+        if self._async_condition is None:
+            self._async_condition = asyncio.Condition()
+        condition = self._async_condition
+        bucket = self._buckets[kind]
+        queue = self._waiting[kind]
+        entry = (priority, next(self._sequence))
+        async with condition:
+            heapq.heappush(queue, entry)
+            condition.notify_all()
+            try:
+                while True:
+                    delay = self._get_delay(bucket, queue, entry)
+                    if delay == 0:
+                        return
+                    try:
+                        await asyncio.wait_for(condition.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                queue.remove(entry)
+                heapq.heapify(queue)
+                condition.notify_all()
@@ -0,0 +1,183 @@
+"""Reconciliation of the entity registries with the entity lists."""
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from collections import namedtuple
+
+from . import tracing
+
+_LOGGER = logging.getLogger(__name__)
+
+AttributeChange = namedtuple("AttributeChange", ["ain", "name", "old", "new"])
+
+
+class ChangeSet(object):
+    """The identifiers changed by an update of an entity registry.
+
+    ``added`` and ``updated`` contain the parsed entities, ``unchanged``
+    the entities skipped because their element did not change. Entities
+    missing in the list are in ``removed`` if they were dropped from the
+    registry, otherwise they are kept and listed in ``missing``.
+
+    The changed attribute values of the updated entities are stored in
+    ``attributes`` as ``{ain: {name: (old, new)}}``.
+    """
+
+    def __init__(self):
+        """Create an empty change set."""
+        self.added = set()
+        self.updated = set()
+        self.unchanged = set()
+        self.removed = set()
+        self.missing = set()
+        self.attributes = {}
+
+    def __repr__(self):
+        """Return a string."""
+        return (
+            "ChangeSet(added={0}, updated={1}, unchanged={2}, removed={3}, "
+            "missing={4})".format(
+                len(self.added),
+                len(self.updated),
+                len(self.unchanged),
+                len(self.removed),
+                len(self.missing),
+            )
+        )
+
+    def has_changes(self):
+        """Check if entities were added, updated or removed."""
+        return bool(self.added or self.updated or self.removed)
+
+    def get_changes(self, ain):
+        """Get the changed attributes of an entity as {name: (old, new)}."""
+        return self.attributes.get(ain, {})
+
+    def iter_changes(self):
+        """Iterate over the changed attributes as ``AttributeChange``."""
+        for (ain, diff) in self.attributes.items():
+            for (name, (old, new)) in diff.items():
+                yield AttributeChange(ain, name, old, new)
+
+    def update(self, other):
+        """Merge the changes of another change set."""
+        self.added |= other.added
+        self.updated |= other.updated
+        self.unchanged |= other.unchanged
+        self.removed |= other.removed
+        self.missing |= other.missing
+        for (ain, diff) in other.attributes.items():
+            merged = self.attributes.setdefault(ain, {})
+            for (name, (old, new)) in diff.items():
+                if name in merged:
+                    old = merged[name][0]
+                if old == new:
+                    merged.pop(name, None)
+                else:
+                    merged[name] = (old, new)
+            if not merged:
+                del self.attributes[ain]
+
+
+def diff_values(old_values, new_values):
+    """Get the changed values as {name: (old, new)}."""
+    diff = {}
+    for (name, new) in new_values.items():
+        old = old_values.get(name)
+        if old != new:
+            diff[name] = (old, new)
+    return diff
+
+
+def reconcile(
+    entities,
+    elements,
+    create,
+    update,
+    ignore_removed=True,
+    tombstones=None,
+    is_unchanged=None,
+    snapshot=None,
+    kind="Entity",
+):
+    """Reconcile the registry with the elements of an entity list.
+
+    ``entities`` maps the identifiers to the entities and is changed in
+    place. ``create(element)`` returns a new entity, ``update(entity,
+    element)`` updates the entity and returns it or a replacement. An
+    element is skipped if ``is_unchanged(identifier, element)`` is true
+    and its entity is known. With ``snapshot(entity)`` returning the
+    attribute values as ``{ain: {name: value}}``, which may include
+    sub-entities like buttons, the changed values of the updated entities
+    are recorded in the change set.
+
+    Missing entities are removed unless ``ignore_removed`` is set. Kept
+    entities get a tombstone with the time they went missing, which is
+    cleared when they are listed again, see ``expire()``.
+
+    Every element and entity is visited once, return the ``ChangeSet``.
+    """
+    changes = ChangeSet()
+    listed = set()
+    for element in elements:
+        identifier = element.attrib["identifier"]
+        listed.add(identifier)
+        if tombstones:
+            tombstones.pop(identifier, None)
+        entity = entities.get(identifier)
+        if is_unchanged is not None and is_unchanged(identifier, element):
+            if entity is not None:
+                changes.unchanged.add(identifier)
+                continue
+
+        if entity is None:
+            if tracing.enabled:
+                _LOGGER.debug("Adding new %s %s", kind, identifier)
+            entity = create(element)
+            changes.added.add(identifier)
+        else:
+            if tracing.enabled:
+                _LOGGER.debug("Updating already existing %s %s", kind, identifier)
+            if snapshot is None:
+                entity = update(entity, element)
+            else:
+                old_values = snapshot(entity)
+                entity = update(entity, element)
+                for (ain, values) in snapshot(entity).items():
+                    diff = diff_values(old_values.get(ain, {}), values)
+                    if diff:
+                        changes.attributes[ain] = diff
+            changes.updated.add(identifier)
+        entities[identifier] = entity
+
+    now = time.monotonic()
+    for identifier in entities.keys() - listed:
+        if ignore_removed:
+            if tombstones is not None:
+                tombstones.setdefault(identifier, now)
+            changes.missing.add(identifier)
+        else:
+            if tracing.enabled:
+                _LOGGER.debug("Removing no more existing %s %s", kind, identifier)
+            del entities[identifier]
+            if tombstones is not None:
+                tombstones.pop(identifier, None)
+            changes.removed.add(identifier)
+
+    return changes
+
+
+def expire(entities, tombstones, max_age):
+    """Remove the entities missing for more than max_age seconds.
+
+    Return the set of the removed identifiers.
+    """
+    deadline = time.monotonic() - max_age
+    expired = {
+        identifier for (identifier, since) in tombstones.items() if since <= deadline
+    }
+    for identifier in expired:
+        del tombstones[identifier]
+        entities.pop(identifier, None)
+    return expired
@@ -0,0 +1,120 @@
+"""Persistent on-disk cache for session data."""
+# -*- coding: utf-8 -*-
+
+import contextlib
+import json
+import logging
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SessionCache(object):
+    """Store session data per host and user in a protected file.
+
+    The file is created with mode 0600. On POSIX systems a file which is
+    accessible by other users or owned by another user is ignored.
+    Concurrent processes are serialized with a lock file.
+    """
+
+    def __init__(self, path):
+        """Create a session cache stored at path."""
+        self._path = os.path.expanduser(path)
+
+    @staticmethod
+    def _key(host, user):
+        return "{0}|{1}".format(host, user or "")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self._path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _is_protected(self):
+        if os.name != "posix":
+            return True
+        stat = os.stat(self._path)
+        if stat.st_uid != os.getuid():
+            _LOGGER.warning("ignore %s, owned by another user", self._path)
+            return False
+        if stat.st_mode & 0o077:
+            _LOGGER.warning("ignore %s, accessible by other users", self._path)
+            return False
+        return True
+
+    def _load(self):
+        try:
+            if not self._is_protected():
+                return {}
+            with open(self._path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            _LOGGER.warning("ignore %s, invalid content", self._path)
+            return {}
+
+    def _store(self, data):
+        directory = os.path.dirname(os.path.abspath(self._path))
+        (fd, tmp_path) = tempfile.mkstemp(dir=directory, prefix=".sessioncache")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _get(self, host, user, name):
+        with self._locked():
+            return self._load().get(self._key(host, user), {}).get(name)
+
+    def _set(self, host, user, name, value):
+        with self._locked():
+            data = self._load()
+            entry = data.setdefault(self._key(host, user), {})
+            if value is None:
+                entry.pop(name, None)
+            else:
+                entry[name] = value
+            self._store(data)
+
+    def get_sid(self, host, user):
+        """Get the cached session ID."""
+        return self._get(host, user, "sid")
+
+    def set_sid(self, host, user, sid):
+        """Store the session ID."""
+        self._set(host, user, "sid", sid)
+
+    def remove_sid(self, host, user):
+        """Remove the cached session ID."""
+        self._set(host, user, "sid", None)
+
+    def get_pbkdf2_hash(self, host, user, salt, iterations):
+        """Get the cached static salt stage of the PBKDF2 login."""
+        hashes = self._get(host, user, "pbkdf2") or {}
+        return hashes.get("{0}${1}".format(iterations, salt))
+
+    def set_pbkdf2_hash(self, host, user, salt, iterations, value):
+        """Store the static salt stage of the PBKDF2 login."""
+        # only the hash of the current salt is kept
+        self._set(host, user, "pbkdf2", {"{0}${1}".format(iterations, salt): value})
+
+    def remove_pbkdf2_hashes(self, host, user):
+        """Remove the cached PBKDF2 hashes."""
+        self._set(host, user, "pbkdf2", None)
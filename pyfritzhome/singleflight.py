@@ -0,0 +1,71 @@
+"""Coalescing of concurrent calls."""
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+
+class _Call(object):
+    """A pending or finished call."""
+
+    def __init__(self):
+        """Create a call."""
+        self.done = threading.Event()
+        self.finished = None
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Share one in-flight call between concurrent callers with the same key.
+
+    A finished call is reused as long as it is younger than the
+    ``max_age`` passed by the caller. Failed calls are never reused.
+    """
+
+    def __init__(self):
+        """Create a single flight group."""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, max_age=0):
+        """Call fn or join the call already running for the key."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None or not self._is_usable(call, max_age):
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+            else:
+                leader = False
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as ex:
+                call.error = ex
+            finally:
+                call.finished = time.monotonic()
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def forget(self, key=None):
+        """Forget the finished call of the key or of all keys."""
+        with self._lock:
+            if key is None:
+                self._calls.clear()
+            else:
+                self._calls.pop(key, None)
+
+    @staticmethod
+    def _is_usable(call, max_age):
+        if not call.done.is_set():
+            return True
+        if call.error is not None:
+            return False
+        return time.monotonic() - call.finished < max_age
@@ -0,0 +1,66 @@
+"""Callbacks for changed attribute values."""
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Subscriptions(object):
+    """Call the subscribed callbacks for the changes of an update.
+
+    A subscription is identified by the AIN and the attribute name, both
+    can be None to match every entity or every attribute. The callback is
+    called with the ``AttributeChange`` after the update, the cost of an
+    update only depends on the number of changed values.
+    """
+
+    def __init__(self):
+        """Create an empty subscription registry."""
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        """Check if there are subscriptions."""
+        return bool(self._callbacks)
+
+    def get_keys(self):
+        """Get the subscribed (ain, name) keys."""
+        with self._lock:
+            return list(self._callbacks.keys())
+
+    def subscribe(self, ain, name, callback):
+        """Subscribe to the changes, return a function to unsubscribe."""
+        key = (ain, name)
+        with self._lock:
+            self._callbacks[key] = self._callbacks.get(key, ()) + (callback,)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = list(self._callbacks.get(key, ()))
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if callbacks:
+                    self._callbacks[key] = tuple(callbacks)
+                else:
+                    self._callbacks.pop(key, None)
+
+        return unsubscribe
+
+    def notify(self, changes):
+        """Call the callbacks subscribed to the changes of the change set."""
+        if not self._callbacks:
+            return
+        for change in changes.iter_changes():
+            for key in (
+                (change.ain, change.name),
+                (change.ain, None),
+                (None, change.name),
+                (None, None),
+            ):
+                for callback in self._callbacks.get(key, ()):
+                    try:
+                        callback(change)
+                    except Exception:
+                        _LOGGER.exception("callback for %s %s failed", *key)
@@ -0,0 +1,35 @@
+"""Tracing of the entity updates.
+
+The tracing messages are only created if tracing is enabled, a disabled
+trace point costs a single flag check::
+
+    if tracing.enabled:
+        _LOGGER.debug("update switch device")
+
+With ``capture_xml`` the raw XML of every parsed element is logged too.
+"""
+# -*- coding: utf-8 -*-
+
+from xml.etree import ElementTree
+
+enabled = False
+capture_xml = False
+
+
+def enable(xml=False):
+    """Enable the tracing, with xml the raw XML elements are logged too."""
+    global enabled, capture_xml
+    enabled = True
+    capture_xml = xml
+
+
+def disable():
+    """Disable the tracing."""
+    global enabled, capture_xml
+    enabled = False
+    capture_xml = False
+
+
+def trace_xml(logger, element):
+    """Log the raw XML of the element."""
+    logger.debug("%s", ElementTree.tostring(element, encoding="unicode"))
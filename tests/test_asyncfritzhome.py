@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from requests.exceptions import HTTPError
+
+from pyfritzhome import AsyncFritzhome, InvalidError, LoginError, NotLoggedInError
+
+from .helper import Helper
+
+
+class TestAsyncFritzhome(object):
+    def setup_method(self):
+        self.mock = AsyncMock()
+        self.fritz = AsyncFritzhome("10.0.0.1", "user", "admin123")
+        self.fritz._request = self.mock
+        self.fritz._sid = "0000001"
+
+    def test_login(self):
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+        ]
+
+        asyncio.run(self.fritz.login())
+        assert self.fritz._sid == "0000000000000001"
+
+    def test_login_fail(self):
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_without_valid_sid"),
+        ]
+
+        with pytest.raises(LoginError):
+            asyncio.run(self.fritz.login())
+
+    def test_login_pbkdf2(self):
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid_pbkdf2"),
+            Helper.response("login_rsp_with_valid_sid_pbkdf2"),
+        ]
+
+        asyncio.run(self.fritz.login())
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/login_sid.lua?version=2",
+            {
+                "username": "user",
+                "response": "b9c232dea345233f5a893b2284931ac8$"
+                "2825c7fbd8cdbcbaf93ca2e8d0798c31cf38394469a9ce89365778dc9103ad82",
+            },
+        )
+
+    def test_logout(self):
+        asyncio.run(self.fritz.logout())
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/login_sid.lua",
+            {"sid": "0000001", "security:command/logout": "1"},
+        )
+        assert self.fritz._sid is None
+
+    def test_not_logged_in_error(self):
+        self.fritz._sid = None
+        with pytest.raises(NotLoggedInError):
+            asyncio.run(self.fritz.update_devices())
+
+    def test_aha_request_invalid(self):
+        self.mock.side_effect = ["inval"]
+
+        with pytest.raises(InvalidError):
+            asyncio.run(self.fritz._aha_request(cmd="testcmd"))
+
+    def test_aha_get_devices(self):
+        self.mock.side_effect = [Helper.response("base/device_list")]
+
+        devices = asyncio.run(self.fritz.get_devices())
+        assert devices[0].name == "Steckdose"
+        assert devices[1].name == "FRITZ!DECT Rep 100 #1"
+
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"sid": "0000001", "switchcmd": "getdevicelistinfos"},
+        )
+
+    def test_device_command(self):
+        self.mock.side_effect = [Helper.response("switch/device_list"), "1"]
+
+        async def run():
+            device = await self.fritz.get_device_by_ain("08761 0000434")
+            return await device.set_switch_state_on()
+
+        assert asyncio.run(run())
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"ain": "08761 0000434", "switchcmd": "setswitchon", "sid": "0000001"},
+        )
+
+    def test_device_set_hkr_state(self):
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_hkr_state_eco"),
+            "1",
+        ]
+
+        async def run():
+            device = await self.fritz.get_device_by_ain("12345")
+            return await device.set_hkr_state("comfort")
+
+        asyncio.run(run())
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"ain": "12345", "switchcmd": "sethkrtsoll", "param": 48, "sid": "0000001"},
+        )
+
+    def test_aha_request_relogin(self):
+        self.fritz._auto_relogin = True
+        self.mock.side_effect = [
+            HTTPError("403 Client Error", response=MagicMock(status_code=403)),
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+            "1",
+        ]
+
+        assert asyncio.run(self.fritz.set_switch_state_on("1"))
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"sid": "0000000000000001", "ain": "1", "switchcmd": "setswitchon"},
+        )
+
+    def test_execute_many(self):
+        self.mock.side_effect = ["1", "inval"]
+
+        results = asyncio.run(
+            self.fritz.execute_many(
+                [("setswitchon", "1", None), ("setswitchoff", "2", None)]
+            )
+        )
+        assert results[0] == "1"
+        assert isinstance(results[1], InvalidError)
+
+    def test_set_target_temperature(self):
+        asyncio.run(self.fritz.set_target_temperature("1", 25.5))
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"sid": "0000001", "ain": "1", "switchcmd": "sethkrtsoll", "param": 51},
+        )
+
+    def test_get_colors(self):
+        self.mock.side_effect = [
+            Helper.response("lightbulb/getcolors_FritzDECT500_34_12_16")
+        ]
+
+        colors = asyncio.run(self.fritz.get_colors("1"))
+        assert len(colors) == 12
+
+    def test_templates(self):
+        self.mock.side_effect = [Helper.response("templates/template_list")]
+
+        template = asyncio.run(self.fritz.get_template_by_ain("tmp0B32F7-1B0650682"))
+        assert template.name == "Base Data"
+
+    @patch("asyncio.sleep", new_callable=AsyncMock)
+    def test_wait_tx_busy(self, sleep):
+        self.mock.side_effect = [
+            Helper.response("base/device_txbusy"),
+            Helper.response("base/device_not_txbusy"),
+        ]
+
+        assert asyncio.run(self.fritz.wait_device_txbusy("11960 0089208"))
+        assert self.mock.call_count == 2
+        sleep.assert_awaited_once_with(0.2)
+
+    def test_wait_tx_busy_fallback(self):
+        self.mock.side_effect = [
+            HTTPError("400 Client Error: Bad Request"),
+            Helper.response("base/device_list_not_txbusy"),
+        ]
+
+        assert asyncio.run(self.fritz.wait_device_txbusy("22960 0089208"))
+        assert not self.fritz._has_getdeviceinfos
+
+    def test_close_foreign_session(self):
+        session = MagicMock()
+        session.close = AsyncMock()
+        fritz = AsyncFritzhome("10.0.0.1", "user", "admin123", session=session)
+
+        asyncio.run(fritz.close())
+        session.close.assert_not_awaited()
+
+    def test_keepalive_interval_rejected(self):
+        with pytest.raises(TypeError):
+            AsyncFritzhome("10.0.0.1", "user", "admin123", keepalive_interval=60)
+
+
+class StubResponse(object):
+    def __init__(self, status, text, reason="OK"):
+        self.status = status
+        self.reason = reason
+        self._text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def text(self):
+        return self._text
+
+
+class TestAsyncFritzhomeRequest(object):
+    def setup_method(self):
+        self.session = MagicMock()
+        self.patcher = patch("pyfritzhome.asyncfritzhome.aiohttp")
+        self.aiohttp = self.patcher.start()
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def test_request(self):
+        self.session.get.return_value = StubResponse(200, "  0000001\n")
+        fritz = AsyncFritzhome("10.0.0.1", "user", "admin123", session=self.session)
+
+        plain = asyncio.run(fritz._request("http://10.0.0.1/x", {"sid": "1"}, 5))
+        assert plain == "0000001"
+        self.aiohttp.ClientTimeout.assert_called_once_with(total=5)
+        self.session.get.assert_called_once_with(
+            "http://10.0.0.1/x",
+            params={"sid": "1"},
+            timeout=self.aiohttp.ClientTimeout.return_value,
+            ssl=None,
+        )
+
+    def test_request_without_ssl_verify(self):
+        self.session.get.return_value = StubResponse(200, "")
+        fritz = AsyncFritzhome(
+            "10.0.0.1", "user", "admin123", ssl_verify=False, session=self.session
+        )
+
+        asyncio.run(fritz._request("https://10.0.0.1/x"))
+        assert self.session.get.call_args.kwargs["ssl"] is False
+
+    def test_request_http_error(self):
+        self.session.get.return_value = StubResponse(403, "", reason="Forbidden")
+        fritz = AsyncFritzhome("10.0.0.1", "user", "admin123", session=self.session)
+
+        with pytest.raises(HTTPError) as excinfo:
+            asyncio.run(fritz._request("http://10.0.0.1/x"))
+        assert excinfo.value.response.status_code == 403
+        assert excinfo.value.response.reason == "Forbidden"
+        assert str(excinfo.value) == "403 Error: Forbidden for url: http://10.0.0.1/x"
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import math
+from array import array
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from requests.exceptions import HTTPError
+
+from pyfritzhome import AsyncFritzhome, Fritzhome
+from pyfritzhome.devicestats import FritzhomeDeviceStats, FritzhomeDeviceStatsCache
+
+from .helper import Helper
+
+
+def request(url, params):
+    if params["switchcmd"] == "getdevicelistinfos":
+        return Helper.response("base/device_list")
+    if params["ain"] == "11959 0171328":
+        raise HTTPError("500 Server Error")
+    return Helper.response("stats/basicdevicestats")
+
+
+class TestFritzhomeDeviceStats(object):
+    def setup_method(self):
+        self.mock = MagicMock()
+        self.fritz = Fritzhome("10.0.0.1", "user", "pass")
+        self.fritz._request = self.mock
+        self.fritz._sid = "0000001"
+
+    def test_get_device_stats(self):
+        self.mock.side_effect = [Helper.response("stats/basicdevicestats")]
+
+        stats = self.fritz.get_device_stats("08761 0000434")
+        self.mock.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {
+                "switchcmd": "getbasicdevicestats",
+                "sid": "0000001",
+                "ain": "08761 0000434",
+            },
+        )
+        assert stats.get_categories() == [
+            "temperature",
+            "humidity",
+            "voltage",
+            "power",
+            "energy",
+        ]
+
+    def test_series(self):
+        stats = FritzhomeDeviceStats.from_xml(Helper.response("stats/basicdevicestats"))
+
+        (temperature,) = stats.get_series("temperature")
+        assert temperature.grid == 900
+        assert temperature.datatime == 1700000000
+        assert len(temperature) == 4
+        assert isinstance(temperature.values, array)
+        assert temperature.values[0] == 22.5
+        assert math.isnan(temperature.values[1])
+        assert list(temperature.values[2:]) == [22.0, 21.5]
+
+        (voltage,) = stats.get_series("voltage")
+        assert list(voltage.values) == [230.12, 229.87, 230.0]
+        (power,) = stats.get_series("power")
+        assert list(power.values[:2]) == [12.5, 0.0]
+        assert math.isnan(power.values[2])
+        (humidity,) = stats.get_series("humidity")
+        assert list(humidity.values[:2]) == [55.0, 56.0]
+
+        assert len(stats.get_series("energy")) == 2
+        (daily,) = stats.get_series("energy", grid=86400)
+        assert list(daily.values) == [42.0, 0.0, 17.0]
+        assert stats.get_series("rel_humidity") == []
+
+    def test_timestamps(self):
+        stats = FritzhomeDeviceStats.from_xml(Helper.response("stats/basicdevicestats"))
+        (daily,) = stats.get_series("energy", grid=86400)
+
+        assert list(daily.get_timestamps()) == [
+            1700000000,
+            1700000000 - 86400,
+            1700000000 - 2 * 86400,
+        ]
+        assert list(daily.items())[1] == (1700000000 - 86400, 0.0)
+
+    def test_timestamps_without_datatime(self):
+        stats = FritzhomeDeviceStats.from_xml(
+            Helper.response("stats/basicdevicestats_no_datatime")
+        )
+        (temperature,) = stats.get_series("temperature")
+
+        assert temperature.datatime is None
+        with pytest.raises(ValueError):
+            temperature.get_timestamps()
+        assert list(temperature.get_timestamps(1000)) == [1000, 100]
+
+    @patch("pyfritzhome.devicestats.numpy", None)
+    def test_as_numpy_missing(self):
+        stats = FritzhomeDeviceStats.from_xml(Helper.response("stats/basicdevicestats"))
+        (temperature,) = stats.get_series("temperature")
+
+        with pytest.raises(RuntimeError):
+            temperature.as_numpy()
+
+    def test_as_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        stats = FritzhomeDeviceStats.from_xml(Helper.response("stats/basicdevicestats"))
+        (temperature,) = stats.get_series("temperature")
+
+        values = temperature.as_numpy()
+        assert values.dtype == numpy.float64
+        assert values[0] == 22.5
+
+    def test_next_update(self):
+        stats = FritzhomeDeviceStats.from_xml(Helper.response("stats/basicdevicestats"))
+        assert stats.get_next_update(1700000005) == 1700000010
+        assert stats.get_next_update(1700000010) == 1700000020
+        # the newest values are older than one grid
+        assert stats.get_next_update(1700003605) == 1700003610
+
+        stats = FritzhomeDeviceStats.from_xml(
+            Helper.response("stats/basicdevicestats_no_datatime")
+        )
+        assert stats.get_next_update(1000) == 1900
+        assert FritzhomeDeviceStats().get_next_update(1000) == 1000
+
+    @patch("pyfritzhome.devicestats.time.time")
+    def test_cache(self, time):
+        fritz = Fritzhome("10.0.0.1", "user", "pass", stats_cache=True)
+        fritz._request = self.mock
+        fritz._sid = "0000001"
+        self.mock.side_effect = [
+            Helper.response("stats/basicdevicestats"),
+            Helper.response("stats/basicdevicestats"),
+            Helper.response("stats/basicdevicestats"),
+        ]
+
+        time.return_value = 1700000005.0
+        stats = fritz.get_device_stats("08761 0000434")
+        assert fritz.get_device_stats("08761 0000434") is stats
+        assert fritz.get_device_statistics("08761 0000434") == Helper.response(
+            "stats/basicdevicestats"
+        )
+        assert self.mock.call_count == 1
+
+        time.return_value = 1700000010.0
+        assert fritz.get_device_stats("08761 0000434") is not stats
+        assert self.mock.call_count == 2
+
+        fritz.invalidate_device_stats("08761 0000434")
+        fritz.get_device_stats("08761 0000434")
+        assert self.mock.call_count == 3
+
+    def test_cache_per_ain(self):
+        cache = FritzhomeDeviceStatsCache()
+        plain = Helper.response("stats/basicdevicestats")
+
+        (_, stats) = cache.set("1", plain, now=1700000000)
+        assert cache.get("1", now=1700000009) == (plain, stats)
+        assert cache.get("2", now=1700000009) is None
+
+        cache.invalidate()
+        assert cache.get("1", now=1700000009) is None
+
+    def test_cache_outdated_series(self):
+        cache = FritzhomeDeviceStatsCache()
+        plain = Helper.response("stats/basicdevicestats")
+
+        (_, stats) = cache.set("1", plain, now=1700086400)
+        assert cache.get("1", now=1700086401) == (plain, stats)
+        assert cache.get("1", now=1700086410) is None
+
+    def test_get_all_device_statistics(self):
+        self.mock.side_effect = request
+
+        results = self.fritz.get_all_device_statistics(max_workers=2)
+        assert sorted(results) == ["08761 0000434", "08761 1048079", "11959 0171328"]
+        assert isinstance(results["08761 0000434"], FritzhomeDeviceStats)
+        assert isinstance(results["11959 0171328"], HTTPError)
+        stats_calls = [
+            call
+            for call in self.mock.call_args_list
+            if call.args[1]["switchcmd"] == "getbasicdevicestats"
+        ]
+        assert len(stats_calls) == 3
+
+    def test_get_all_device_statistics_ains(self):
+        self.mock.side_effect = request
+
+        results = self.fritz.get_all_device_statistics(ains=["08761 0000434"])
+        assert list(results) == ["08761 0000434"]
+        assert self.mock.call_count == 1
+        assert self.fritz.get_all_device_statistics(ains=[]) == {}
+
+    @patch("pyfritzhome.devicestats.time.time", return_value=1700000005.0)
+    def test_get_all_device_statistics_cached(self, time):
+        fritz = Fritzhome("10.0.0.1", "user", "pass", stats_cache=True)
+        fritz._request = self.mock
+        fritz._sid = "0000001"
+        self.mock.side_effect = request
+
+        ains = ["08761 0000434", "08761 1048079"]
+        first = fritz.get_all_device_statistics(ains=ains)
+        second = fritz.get_all_device_statistics(ains=ains)
+        assert self.mock.call_count == 2
+        assert all(first[ain] is second[ain] for ain in ains)
+
+    def test_get_all_device_statistics_async(self):
+        fritz = AsyncFritzhome("10.0.0.1", "user", "pass")
+        fritz._request = AsyncMock(side_effect=request)
+        fritz._sid = "0000001"
+
+        results = asyncio.run(fritz.get_all_device_statistics(max_workers=2))
+        assert sorted(results) == ["08761 0000434", "08761 1048079", "11959 0171328"]
+        assert isinstance(results["08761 1048079"], FritzhomeDeviceStats)
+        assert isinstance(results["11959 0171328"], HTTPError)
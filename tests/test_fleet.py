@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from requests.exceptions import HTTPError
+
+from pyfritzhome import Fritzhome, FritzhomeFleet, LoginError
+
+from .helper import Helper
+
+
+class TestFritzhomeFleet(object):
+    def _fritz(self, response="base/device_list"):
+        fritz = Fritzhome("10.0.0.1", "user", "admin123")
+        fritz._request = MagicMock(return_value=Helper.response(response))
+        fritz._sid = "0000001"
+        return fritz
+
+    def setup_method(self):
+        self.fleet = FritzhomeFleet(interval=60.0)
+        self.fleet.add("box1", self._fritz())
+        self.fleet.add("box2", self._fritz("switch/device_list"))
+
+    def test_add_duplicate(self):
+        with pytest.raises(ValueError):
+            self.fleet.add("box1", self._fritz())
+
+    def test_poll(self):
+        assert self.fleet.poll() == {}
+
+        devices = self.fleet.get_devices_as_dict()
+        assert ("box1", "08761 0000434") in devices
+        assert ("box2", "08761 0000434") in devices
+        assert (
+            devices[("box1", "08761 0000434")] is not devices[("box2", "08761 0000434")]
+        )
+        assert self.fleet.get_device("box1", "08761 0000434").name == "Steckdose"
+
+    def test_poll_login(self):
+        fritz = self.fleet.get_fritzhome("box1")
+        fritz._sid = None
+        fritz.login = MagicMock()
+
+        self.fleet.poll(["box1"])
+        fritz.login.assert_called_once_with()
+
+    def test_poll_login_expired_session(self):
+        fritz = self.fleet.get_fritzhome("box1")
+        fritz._request.side_effect = [
+            HTTPError("403 Client Error", response=MagicMock(status_code=403)),
+            Helper.response("base/device_list"),
+        ]
+        fritz.login = MagicMock()
+
+        assert self.fleet.poll(["box1"]) == {}
+        fritz.login.assert_called_once_with()
+        assert len(self.fleet.get_devices()) == 5
+
+    def test_poll_http_error(self):
+        fritz = self.fleet.get_fritzhome("box1")
+        fritz._request.side_effect = HTTPError(
+            "500 Server Error", response=MagicMock(status_code=500)
+        )
+        fritz.login = MagicMock()
+
+        errors = self.fleet.poll(["box1"])
+        assert isinstance(errors["box1"], HTTPError)
+        fritz.login.assert_not_called()
+
+    def test_poll_failure_isolated(self):
+        fritz = self.fleet.get_fritzhome("box1")
+        fritz._sid = None
+        fritz.login = MagicMock(side_effect=LoginError("user"))
+
+        errors = self.fleet.poll()
+        assert list(errors.keys()) == ["box1"]
+        assert isinstance(errors["box1"], LoginError)
+        assert len(self.fleet.get_devices()) == 3
+
+        self.fleet.poll()
+        failures, error, last_update = self.fleet.get_status("box1")
+        assert failures == 2
+        assert error is not None
+        assert last_update is None
+
+    def test_failure_backoff(self):
+        fleet = FritzhomeFleet(interval=10.0, max_backoff=30.0)
+        fritz = self._fritz()
+        fritz.update_devices = MagicMock(side_effect=ConnectionError)
+        fleet.add("box", fritz)
+        box = fleet._boxes["box"]
+
+        delays = []
+        for _ in range(4):
+            fleet.poll()
+            delays.append(box.next_poll - time.monotonic())
+        assert [round(delay) for delay in delays] == [10, 20, 30, 30]
+
+    def test_remove(self):
+        self.fleet.poll()
+        self.fleet.remove("box2")
+        assert self.fleet.get_names() == ["box1"]
+        assert len(self.fleet.get_devices()) == 5
+
+    def test_start_stop(self):
+        fleet = FritzhomeFleet(interval=0.05, max_workers=2)
+        fritz = self._fritz()
+        fleet.add("box", fritz)
+
+        fleet.start()
+        deadline = time.monotonic() + 5
+        while fritz._request.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        fleet.stop()
+
+        assert fritz._request.call_count >= 2
+        assert len(fleet.get_devices()) == 5
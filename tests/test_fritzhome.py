@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, HTTPError
+from threading import Event, Thread
 from unittest.mock import MagicMock, patch
 
 import pytest
+import time
 
 from pyfritzhome import Fritzhome, InvalidError, LoginError, NotLoggedInError
+from pyfritzhome.devicetypes.fritzhomedevicefeatures import FritzhomeDeviceFeatures
 
 from .helper import Helper
 
@@ -64,12 +68,56 @@ class TestFritzhome(object):
             },
         )
 
+    def test_login_pbkdf2_static_hash_cached(self):
+        responses = [
+            Helper.response("login_rsp_without_valid_sid_pbkdf2"),
+            Helper.response("login_rsp_with_valid_sid_pbkdf2"),
+        ]
+        self.mock.side_effect = responses * 2
+
+        with patch.object(Fritzhome, "_pbkdf2", wraps=Fritzhome._pbkdf2) as pbkdf2:
+            self.fritz.login()
+            assert pbkdf2.call_count == 2
+            self.fritz.login()
+            assert pbkdf2.call_count == 3
+        self.fritz._request.assert_called_with(
+            "http://10.0.0.1/login_sid.lua?version=2",
+            {
+                "username": "user",
+                "response": "b9c232dea345233f5a893b2284931ac8$"
+                "2825c7fbd8cdbcbaf93ca2e8d0798c31cf38394469a9ce89365778dc9103ad82",
+            },
+        )
+
+    def test_login_pbkdf2_static_hash_forgotten(self):
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid_pbkdf2"),
+            Helper.response("login_rsp_without_valid_sid_pbkdf2"),
+        ]
+
+        with pytest.raises(LoginError):
+            self.fritz.login()
+        assert self.fritz._pbkdf2_hashes == {}
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {"specialized_devices": True, "lazy_devices": True},
+            {"specialized_devices": True, "compact_devices": True},
+            {"compact_devices": True, "lazy_devices": True},
+        ],
+    )
+    def test_device_options_exclusive(self, options):
+        with pytest.raises(ValueError):
+            Fritzhome("10.0.0.1", "user", "pass", **options)
+
     def test_logout(self):
         self.fritz.logout()
         self.fritz._request.assert_called_with(
             "http://10.0.0.1/login_sid.lua",
             {"sid": "0000001", "security:command/logout": "1"},
         )
+        assert not self.fritz.is_logged_in()
 
     def test_not_logged_in_error(self):
         self.fritz._sid = None
@@ -153,6 +201,559 @@ class TestFritzhome(object):
             {"sid": "0000001", "switchcmd": "getdevicelistinfos"},
         )
 
+    def test_update_devices_stream(self):
+        plain = Helper.response("base/device_list").encode("utf-8")
+        self.fritz._request_stream = MagicMock(
+            return_value=iter(plain[i : i + 100] for i in range(0, len(plain), 100))
+        )
+
+        self.fritz.update_devices(stream=True)
+
+        devices = self.fritz.get_devices()
+        assert devices[0].name == "Steckdose"
+        assert devices[0].fw_version == "03.33"
+        assert devices[1].name == "FRITZ!DECT Rep 100 #1"
+        self.fritz._request_stream.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"sid": "0000001", "switchcmd": "getdevicelistinfos"},
+        )
+
+    def test_update_devices_stream_removed(self):
+        self.mock.side_effect = [Helper.response("base/device_list")]
+        self.fritz.update_devices()
+        assert len(self.fritz.get_devices()) == 5
+
+        plain = Helper.response("base/device_list_removed_device").encode("utf-8")
+        self.fritz._request_stream = MagicMock(return_value=iter([plain]))
+        self.fritz.update_devices(ignore_removed=False, stream=True)
+        assert len(self.fritz.get_devices()) == 4
+
+    @pytest.mark.parametrize("plain", [b"inval\n", b"inval"])
+    def test_update_devices_stream_invalid(self, plain):
+        self.fritz._request_stream = MagicMock(return_value=iter([plain]))
+
+        with pytest.raises(InvalidError):
+            self.fritz.update_devices(stream=True)
+
+    def test_update_devices_skip_unchanged(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_low"),
+        ]
+
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("11959 0171328")
+        assert self.fritz.get_update_counters() == {"skipped": 0, "parsed": 1}
+
+        self.fritz.update_devices()
+        assert self.fritz.get_update_counters() == {"skipped": 1, "parsed": 1}
+        assert not device.battery_low
+
+        self.fritz.update_devices()
+        assert self.fritz.get_update_counters() == {"skipped": 1, "parsed": 2}
+        assert device.battery_low
+
+    def test_update_devices_skip_unchanged_device(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list_removed_device"),
+        ]
+
+        self.fritz.update_devices()
+        assert self.fritz.get_update_counters() == {"skipped": 0, "parsed": 5}
+
+        self.fritz.update_devices(ignore_removed=False)
+        assert self.fritz.get_update_counters() == {"skipped": 4, "parsed": 5}
+        assert len(self.fritz.get_devices()) == 4
+
+    def test_update_devices_change_set(self):
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list_removed_device"),
+            Helper.response("base/device_list"),
+        ]
+
+        changes = self.fritz.update_devices()
+        assert len(changes.added) == 5
+        assert changes.updated == set()
+
+        changes = self.fritz.update_devices(ignore_removed=False)
+        assert changes.added == set()
+        assert len(changes.updated) == 4
+        assert changes.removed == {"05333 0077045-1"}
+
+        changes = self.fritz.update_devices()
+        assert changes.added == {"05333 0077045-1"}
+        assert changes.has_changes()
+
+    def test_update_devices_unchanged_change_set(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list"),
+        ]
+
+        self.fritz.update_devices()
+        changes = self.fritz.update_devices()
+        assert len(changes.unchanged) == 5
+        assert not changes.has_changes()
+
+    def test_update_devices_unchanged_first_poll(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list"),
+        ]
+
+        self.fritz.update_devices()
+        with patch.object(Fritzhome, "_parse_listinfo_elements") as parse:
+            self.fritz.update_devices()
+        parse.assert_not_called()
+
+    def test_update_devices_unchanged_after_stream(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_ok"),
+        ]
+        plain = Helper.response("thermostat/device_list_battery_low").encode("utf-8")
+        self.fritz._request_stream = MagicMock(return_value=iter([plain]))
+
+        self.fritz.update_devices()
+        self.fritz.update_devices()
+        self.fritz.update_devices(stream=True)
+        device = self.fritz.get_device_by_ain("11959 0171328")
+        assert device.battery_low
+
+        changes = self.fritz.update_devices()
+        assert changes.updated == {"11959 0171328"}
+        assert not device.battery_low
+
+    def test_update_devices_unchanged_removed(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list_removed_device"),
+            Helper.response("base/device_list_removed_device"),
+            Helper.response("base/device_list_removed_device"),
+        ]
+
+        self.fritz.update_devices()
+        self.fritz.update_devices()
+        changes = self.fritz.update_devices()
+        assert changes.missing == {"05333 0077045-1"}
+        assert len(changes.unchanged) == 4
+        assert self.fritz.get_update_counters() == {"skipped": 8, "parsed": 5}
+
+        changes = self.fritz.update_devices(ignore_removed=False)
+        assert changes.removed == {"05333 0077045-1"}
+        assert len(self.fritz.get_devices()) == 4
+
+    @pytest.mark.parametrize(
+        "options",
+        [{}, {"specialized_devices": True}, {"compact_devices": True}],
+    )
+    def test_update_devices_attribute_changes(self, options):
+        fritz = Fritzhome("10.0.0.1", "user", "pass", **options)
+        fritz._request = MagicMock(
+            side_effect=[
+                Helper.response("thermostat/device_list_battery_ok"),
+                Helper.response("thermostat/device_list_battery_low"),
+            ]
+        )
+        fritz._sid = "0000001"
+
+        fritz.update_devices()
+        changes = fritz.update_devices()
+        assert changes.get_changes("11959 0171328") == {
+            "battery_level": (80, 10),
+            "battery_low": (False, True),
+        }
+        assert sorted(changes.iter_changes()) == [
+            ("11959 0171328", "battery_level", 80, 10),
+            ("11959 0171328", "battery_low", False, True),
+        ]
+
+    def test_update_devices_no_attribute_changes(self):
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list"),
+        ]
+
+        self.fritz.update_devices()
+        changes = self.fritz.update_devices()
+        assert len(changes.updated) == 5
+        assert changes.attributes == {}
+        assert list(changes.iter_changes()) == []
+
+    def test_subscribe(self):
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_low"),
+        ]
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("11959 0171328")
+
+        battery_low = MagicMock()
+        device.subscribe("battery_low", battery_low)
+        target_temperature = MagicMock()
+        device.subscribe("target_temperature", target_temperature)
+        every = MagicMock()
+        unsubscribe = self.fritz.subscribe(None, None, every)
+
+        self.fritz.update_devices()
+        battery_low.assert_not_called()
+        every.assert_not_called()
+
+        self.fritz.update_devices()
+        battery_low.assert_called_once_with(
+            ("11959 0171328", "battery_low", False, True)
+        )
+        target_temperature.assert_not_called()
+        assert every.call_count == 2
+
+        unsubscribe()
+        assert not any(self.fritz._subscriptions._callbacks.get((None, None), ()))
+
+    def test_subscribe_callback_error(self):
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_low"),
+        ]
+        self.fritz.update_devices()
+
+        failing = MagicMock(side_effect=ValueError)
+        callback = MagicMock()
+        self.fritz.subscribe("11959 0171328", "battery_low", failing)
+        self.fritz.subscribe("11959 0171328", "battery_low", callback)
+
+        self.fritz.update_devices()
+        failing.assert_called_once()
+        callback.assert_called_once()
+
+    def test_device_indexes(self):
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list_removed_device"),
+        ]
+        self.fritz.update_devices()
+
+        assert [d.ain for d in self.fritz.get_devices_by_name("Steckdose")] == [
+            "08761 0000434"
+        ]
+        assert self.fritz.get_device_by_id(17).ain == "08761 0000434"
+        assert self.fritz.get_device_by_id("2000").ain == "05333 0077045-1"
+        with pytest.raises(KeyError):
+            self.fritz.get_device_by_id("1")
+        assert [d.ain for d in self.fritz.get_devices_by_product("HAN-FUN")] == [
+            "05333 0077045-1"
+        ]
+        assert {
+            d.ain
+            for d in self.fritz.get_devices_by_feature(
+                FritzhomeDeviceFeatures.TEMPERATURE
+            )
+        } == {"08761 0000434", "08761 1048079", "11959 0171328"}
+        assert [d.ain for d in self.fritz.get_group_members("65:3A:18-900")] == [
+            "08761 0000434"
+        ]
+        assert [d.ain for d in self.fritz.get_device_groups("08761 0000434")] == [
+            "65:3A:18-900"
+        ]
+        assert self.fritz.get_device_groups("11959 0171328") == []
+
+        self.fritz.update_devices(ignore_removed=False)
+        assert self.fritz.get_devices_by_name("Fenster") == []
+        assert self.fritz.get_devices_by_product("HAN-FUN") == []
+        with pytest.raises(KeyError):
+            self.fritz.get_device_by_id("2000")
+
+    @pytest.mark.parametrize(
+        "options",
+        [{}, {"specialized_devices": True}, {"compact_devices": True}],
+    )
+    def test_update_devices_fields(self, options):
+        fritz = Fritzhome("10.0.0.1", "user", "pass", **options)
+        fritz._request = MagicMock(
+            side_effect=[
+                Helper.response("switch/device_list"),
+                Helper.response("switch/device_list"),
+            ]
+        )
+        fritz._sid = "0000001"
+
+        fritz.update_devices(fields={"power", "energy"})
+        device = fritz.get_device_by_ain("08761 0000434")
+        assert device.name == "Steckdose"
+        assert device.power == 0
+        assert device.energy == 707
+        assert device.temperature is None
+        assert device.switch_state is None
+
+        fritz.update_devices()
+        assert device.temperature == 28.5
+        assert device.switch_state is True
+
+    def test_update_devices_fields_not_skipped(self):
+        self.fritz._skip_unchanged = True
+        self.mock.side_effect = [
+            Helper.response("switch/device_list"),
+            Helper.response("switch/device_list"),
+        ]
+
+        self.fritz.update_devices(fields=["power"])
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("08761 0000434")
+        assert device.temperature == 28.5
+
+    def test_update_devices_unknown_fields(self):
+        with pytest.raises(ValueError):
+            self.fritz.update_devices(fields={"power", "foo"})
+        self.mock.assert_not_called()
+
+    def test_expire_removed(self):
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            Helper.response("base/device_list_removed_device"),
+        ]
+
+        self.fritz.update_devices()
+        changes = self.fritz.update_devices()
+        assert changes.missing == {"05333 0077045-1"}
+        assert len(self.fritz.get_devices()) == 5
+
+        assert self.fritz.expire_removed(3600) == set()
+        assert self.fritz.expire_removed(0) == {"05333 0077045-1"}
+        assert len(self.fritz.get_devices()) == 4
+        assert self.fritz.expire_removed(0) == set()
+
+    def test_get_device_elements_coalesced(self):
+        release = Event()
+
+        def request(url, params):
+            release.wait(5)
+            return Helper.response("base/device_list")
+
+        self.mock.side_effect = request
+        results = []
+        threads = [
+            Thread(target=lambda: results.append(self.fritz.get_device_elements()))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        # give all threads the chance to join the in-flight request
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert self.mock.call_count == 1
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+
+    def test_get_device_elements_max_age(self):
+        self.fritz._listinfo_max_age = 60
+        self.mock.side_effect = [
+            Helper.response("base/device_list"),
+            "1",
+            Helper.response("base/device_list"),
+        ]
+
+        self.fritz.get_device_element("08761 0000434")
+        self.fritz.update_devices()
+        assert self.mock.call_count == 1
+
+        # a command invalidates the cached list
+        self.fritz.set_switch_state_on("08761 0000434")
+        self.fritz.get_device_elements()
+        assert self.mock.call_count == 3
+
+    def test_execute_many(self):
+        def request(url, params):
+            if params["ain"] == "2":
+                return "inval"
+            return params["ain"]
+
+        self.mock.side_effect = request
+
+        results = self.fritz.execute_many(
+            [
+                ("setswitchon", "1", None),
+                ("setswitchoff", "2", None),
+                ("setlevel", "3", {"level": 10}),
+            ],
+            max_workers=2,
+        )
+        assert results[0] == "1"
+        assert isinstance(results[1], InvalidError)
+        assert results[2] == "3"
+        assert self.mock.call_count == 3
+        self.mock.assert_any_call(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"sid": "0000001", "ain": "3", "switchcmd": "setlevel", "level": 10},
+        )
+
+    def test_execute_many_keeps_adapter(self):
+        assert self.fritz.execute_many([]) == []
+        adapter = self.fritz._session.get_adapter("http://10.0.0.1")
+        assert adapter._pool_maxsize == Fritzhome._POOL_MAXSIZE
+
+        custom = HTTPAdapter(max_retries=3)
+        self.fritz._session.mount("http://", custom)
+        self.mock.return_value = "1"
+        self.fritz.execute_many([("setswitchon", str(i), None) for i in range(20)], 20)
+        assert self.fritz._session.get_adapter("http://10.0.0.1") is custom
+
+    @staticmethod
+    def _forbidden():
+        return HTTPError("403 Client Error", response=MagicMock(status_code=403))
+
+    def test_aha_request_relogin(self):
+        self.fritz._auto_relogin = True
+        self.mock.side_effect = [
+            self._forbidden(),
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+            "1",
+        ]
+
+        assert self.fritz.set_switch_state_on("1")
+        assert self.fritz._sid == "0000000000000001"
+        self.mock.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {"sid": "0000000000000001", "ain": "1", "switchcmd": "setswitchon"},
+        )
+
+    def test_update_devices_stream_relogin(self):
+        self.fritz._auto_relogin = True
+        self.fritz._last_activity = 0
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+        ]
+        plain = Helper.response("base/device_list").encode("utf-8")
+
+        def request_stream(url, params):
+            if params["sid"] == "0000001":
+                raise self._forbidden()
+            yield plain
+
+        self.fritz._request_stream = MagicMock(side_effect=request_stream)
+        self.fritz.update_devices(stream=True)
+
+        assert len(self.fritz.get_devices()) == 5
+        assert self.fritz._request_stream.call_count == 2
+        assert self.fritz._last_activity > 0
+
+    def test_aha_request_relogin_disabled(self):
+        self.mock.side_effect = [self._forbidden()]
+
+        with pytest.raises(HTTPError):
+            self.fritz.set_switch_state_on("1")
+        assert self.mock.call_count == 1
+
+    def test_aha_request_relogin_toggle_not_retried(self):
+        self.fritz._auto_relogin = True
+        self.mock.side_effect = [
+            self._forbidden(),
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+        ]
+
+        with pytest.raises(HTTPError):
+            self.fritz.set_switch_state_toggle("1")
+        assert self.fritz._sid == "0000000000000001"
+        assert self.mock.call_count == 3
+
+    def test_aha_request_relogin_single_flight(self):
+        self.fritz._auto_relogin = True
+        release = Event()
+        logins = []
+
+        def request(url, params):
+            if "login_sid.lua" in url:
+                if "response" in params:
+                    logins.append(params)
+                    return Helper.response("login_rsp_with_valid_sid")
+                return Helper.response("login_rsp_without_valid_sid")
+            if params["sid"] == "0000001":
+                release.wait(5)
+                raise self._forbidden()
+            return "1"
+
+        self.mock.side_effect = request
+        results = []
+        threads = [
+            Thread(target=lambda: results.append(self.fritz.set_switch_state_on("1")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(logins) == 1
+        assert results == [True] * 5
+
+    def test_refresh_session(self):
+        self.fritz._sid = "0000000000000001"
+        self.mock.side_effect = [Helper.response("login_rsp_with_valid_sid")]
+
+        self.fritz.refresh_session()
+        assert self.mock.call_count == 1
+        assert self.fritz._sid == "0000000000000001"
+
+    def test_refresh_session_expired(self):
+        self.fritz._sid = "0000000000000001"
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+        ]
+
+        self.fritz.refresh_session()
+        assert self.mock.call_count == 3
+
+    def test_keepalive(self):
+        self.fritz._keepalive_interval = 0
+        self.fritz._sid = "0000000000000001"
+        self.mock.return_value = Helper.response("login_rsp_with_valid_sid")
+
+        with patch.object(self.fritz, "_schedule_keepalive") as schedule:
+            self.fritz._keepalive()
+        schedule.assert_called_once_with()
+        self.mock.assert_called_once_with(
+            "http://10.0.0.1/login_sid.lua?version=2", {"sid": "0000000000000001"}
+        )
+
+    @patch("threading.Timer")
+    def test_keepalive_recent_activity(self, timer):
+        self.fritz._keepalive_interval = 600
+        self.fritz._last_activity = time.monotonic() - 500
+
+        self.fritz._keepalive()
+        self.mock.assert_not_called()
+        (delay, _) = timer.call_args[0]
+        assert 99 < delay <= 100
+
+    @patch("threading.Timer")
+    def test_keepalive_refresh_failed(self, timer):
+        self.fritz._keepalive_interval = 600
+        self.fritz._last_activity = time.monotonic() - 600
+        self.mock.side_effect = ConnectionError
+
+        self.fritz._keepalive()
+        (delay, _) = timer.call_args[0]
+        assert delay == 600
+
     def test_get_device_name(self):
         self.mock.side_effect = ["testname"]
 
@@ -392,3 +993,40 @@ class TestFritzhome(object):
 
         assert not self.fritz.wait_device_txbusy("11960 0089208", 1)
         assert self.mock.call_count == 1
+
+    @patch("time.sleep")
+    def test_wait_devices_tx_busy(self, sleep):
+        self.mock.side_effect = [
+            Helper.response("base/device_list_multiple_txbusy"),
+            Helper.response("base/device_not_txbusy"),
+            Helper.response("base/device_txbusy"),
+            Helper.response("base/device_not_txbusy"),
+        ]
+
+        pending = self.fritz.wait_devices_txbusy(
+            ["08761 0000001", "08761 0000002", "08761 0000004", "11960 0089208"],
+        )
+        assert pending == set()
+        assert self.mock.call_count == 4
+        # few remaining devices are polled with getdeviceinfos
+        assert self.mock.call_args[0][1]["switchcmd"] == "getdeviceinfos"
+        assert sleep.call_args_list == [((0.2,),), ((0.2 * 1.5,),)]
+
+    def test_wait_devices_tx_busy_timeout(self):
+        clock = [0.0]
+
+        def sleep(delay):
+            clock[0] += delay
+
+        self.fritz._has_getdeviceinfos = False
+        self.mock.return_value = Helper.response("base/device_list_multiple_txbusy")
+
+        with patch("time.sleep", side_effect=sleep) as sleep_mock, patch(
+            "time.monotonic", side_effect=lambda: clock[0]
+        ):
+            pending = self.fritz.wait_devices_txbusy(
+                ["08761 0000001", "08761 0000002", "08761 0000003"], timeout=1.0
+            )
+        assert pending == {"08761 0000001", "08761 0000003"}
+        assert self.mock.call_count == 4
+        assert len(sleep_mock.call_args_list) == 3
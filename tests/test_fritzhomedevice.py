@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import glob
+import json
+from unittest.mock import MagicMock, patch
+from xml.etree import ElementTree
+
+import pytest
+
+from pyfritzhome.devicetypes import FritzhomeDeviceProfile
+from pyfritzhome.devicetypes.fritzhomedevicefeatures import FritzhomeDeviceFeatures
+from pyfritzhome import Fritzhome
+from pyfritzhome.fritzhomedevice import (
+    FritzhomeDevice,
+    create_device,
+    get_device_class,
+)
+
+from .helper import Helper
+
+
+def device_elements():
+    for path in sorted(glob.glob("tests/responses/*/device*.xml")):
+        try:
+            dom = ElementTree.parse(path).getroot()
+        except ElementTree.ParseError:
+            continue
+        elements = [dom] if dom.tag in ("device", "group") else dom.findall("*")
+        for element in elements:
+            yield pytest.param(element, id=path + ":" + element.attrib["identifier"])
+
+
+def public_values(entity):
+    values = {
+        name: value for (name, value) in vars(entity).items() if name[0] != "_"
+    }
+    if values.get("supported_features") is not None:
+        values["supported_features"] = [
+            feature.name for feature in values["supported_features"]
+        ]
+    if "buttons" in values:
+        values["buttons"] = {
+            ain: public_values(button) for (ain, button) in values["buttons"].items()
+        }
+    return values
+
+
+with open("tests/responses/device_values.json", encoding="UTF-8") as file:
+    DEVICE_VALUES = json.load(file)
+
+
+def state(device):
+    values = dict(vars(device))
+    if "buttons" in values:
+        values["buttons"] = {
+            ain: vars(button) for (ain, button) in values["buttons"].items()
+        }
+    return values
+
+
+class TestFritzhomeDevice(object):
+    @pytest.mark.parametrize("element", list(device_elements()))
+    @patch("time.time", return_value=1700000000.0)
+    def test_parser_values(self, time, element, request):
+        # values recorded with the parser of the device type classes
+        key = request.node.callspec.id[len("tests/responses/") :]
+        device = FritzhomeDevice(node=element)
+
+        assert public_values(device) == DEVICE_VALUES[key]
+
+    def test_profile_shared(self):
+        elements = [param.values[0] for param in device_elements()]
+        devices = [FritzhomeDevice(node=element) for element in elements]
+        plugs = [device for device in devices if device._functionsbitmask == 896]
+
+        assert len(plugs) > 1
+        assert all(plug._profile is plugs[0]._profile for plug in plugs)
+        assert plugs[0]._profile is FritzhomeDeviceProfile.get(896)
+        assert all(
+            plug.supported_features is plugs[0].supported_features for plug in plugs
+        )
+
+    def test_profile(self):
+        profile = FritzhomeDeviceProfile.get(896)
+
+        assert profile.has_switch
+        assert profile.has_powermeter
+        assert profile.has_temperature_sensor
+        assert not profile.has_thermostat
+        assert profile.supported_features == [
+            FritzhomeDeviceFeatures.POWER_METER,
+            FritzhomeDeviceFeatures.TEMPERATURE,
+            FritzhomeDeviceFeatures.SWITCH,
+        ]
+        assert [tag for (_, tag) in profile.parse_plan] == [
+            "temperature",
+            "switch",
+            "powermeter",
+        ]
+        with pytest.raises(AttributeError):
+            profile.has_switch = False
+
+    def test_profile_hanfun_switch(self):
+        assert FritzhomeDeviceProfile.get(0x8000).has_switch
+        assert not FritzhomeDeviceProfile.get(0x8004).has_switch
+        assert [tag for (_, tag) in FritzhomeDeviceProfile.get(0x8000).parse_plan] == [
+            "simpleonoff"
+        ]
+
+    @pytest.mark.parametrize("element", list(device_elements()))
+    @patch("time.time", return_value=1700000000.0)
+    def test_specialized_equivalent(self, time, element):
+        device = FritzhomeDevice(node=element)
+        specialized = create_device(None, element)
+
+        assert isinstance(specialized, FritzhomeDevice)
+        assert type(specialized) is not FritzhomeDevice
+        assert specialized.__dict__ == {}
+        for name in dir(FritzhomeDevice):
+            if name.startswith("has_") or not name.startswith("_"):
+                value = getattr(device, name)
+                if not callable(value) and name != "buttons":
+                    assert getattr(specialized, name) == value, name
+
+    def test_specialized_class(self):
+        cls = get_device_class(320)
+
+        assert cls is get_device_class(320)
+        assert issubclass(cls, FritzhomeDevice)
+        assert "target_temperature" in cls.__slots__
+        assert "switch_state" not in cls.__slots__
+
+        device = cls()
+        assert device.switch_state is None
+        assert not device.has_switch
+        with pytest.raises(AttributeError):
+            device.unknown
+
+    def test_specialized_devices_class_changed(self):
+        fritz = Fritzhome("10.0.0.1", "user", "pass", specialized_devices=True)
+        fritz._request = MagicMock()
+        fritz._sid = "0000001"
+        plain = Helper.response("base/device_list")
+        fritz._request.side_effect = [
+            plain,
+            plain.replace('functionbitmask="896"', 'functionbitmask="768"'),
+        ]
+
+        fritz.update_devices()
+        device = fritz.get_device_by_ain("08761 0000434")
+        assert device.has_powermeter
+        assert device.get_switch_power
+
+        fritz.update_devices()
+        changed = fritz.get_device_by_ain("08761 0000434")
+        assert changed is not device
+        assert not changed.has_powermeter
+        assert changed.switch_state
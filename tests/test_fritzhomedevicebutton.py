@@ -53,3 +53,27 @@ class TestFritzhomeDeviceButton(object):
         device = self.fritz.get_device_by_ain("12345 0000002")
         assert device.present
         assert device.rel_humidity == 44
+
+    def test_subscribe_button(self):
+        self.mock.side_effect = [
+            Helper.response("button/device_button_fritzdect440"),
+            Helper.response("button/device_button_fritzdect440"),
+            Helper.response("button/device_button_fritzdect440_pressed"),
+        ]
+
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("12345 0000001")
+        callback = MagicMock()
+        device.subscribe_button("12345 0000001-1", callback)
+        other = MagicMock()
+        device.subscribe_button("12345 0000001-2", other)
+
+        changes = self.fritz.update_devices()
+        assert changes.attributes == {}
+        callback.assert_not_called()
+
+        self.fritz.update_devices()
+        callback.assert_called_once_with(
+            ("12345 0000001-1", "last_pressed", 1608557681, 1608557999)
+        )
+        other.assert_not_called()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pyfritzhome import (
+    Fritzhome,
+    FritzhomeDevice,
+    FritzhomeDeviceState,
+    FritzhomeDeviceView,
+)
+
+from .helper import Helper
+from .test_fritzhomedevice import device_elements
+
+
+class TestFritzhomeDeviceState(object):
+    def setup_method(self):
+        self.mock = MagicMock()
+        self.fritz = Fritzhome("10.0.0.1", "user", "pass", compact_devices=True)
+        self.fritz._request = self.mock
+        self.fritz._sid = "0000001"
+
+    @pytest.mark.parametrize("element", list(device_elements()))
+    @patch("time.time", return_value=1700000000.0)
+    def test_view_equivalent(self, time, element):
+        device = FritzhomeDevice(node=element)
+        view = FritzhomeDeviceView(node=element)
+
+        assert view.__dict__ == {}
+        for name in dir(FritzhomeDevice):
+            if name.startswith("has_") or not name.startswith("_"):
+                value = getattr(device, name)
+                if not callable(value) and name != "buttons":
+                    assert getattr(view, name) == value, name
+
+    def test_state(self):
+        self.mock.side_effect = [Helper.response("base/device_list")]
+        self.fritz.update_devices()
+
+        device = self.fritz.get_device_by_ain("11959 0171328")
+        assert isinstance(device, FritzhomeDeviceView)
+        state = device.device_state
+        assert type(state) is FritzhomeDeviceState.get_class(320)
+        assert not hasattr(state, "__dict__")
+        assert not hasattr(state, "_fritz")
+        assert not hasattr(state, "switch_state")
+        assert state.target_temperature == 18.0
+
+        view = state.view(self.fritz)
+        assert view.device_state is state
+        assert view.switch_state is None
+        assert view.get_hkr_state() == "eco"
+
+        self.mock.side_effect = None
+        view.set_target_temperature(19.0)
+        self.mock.assert_called_with(
+            "http://10.0.0.1/webservices/homeautoswitch.lua",
+            {
+                "sid": "0000001",
+                "ain": "11959 0171328",
+                "switchcmd": "sethkrtsoll",
+                "param": 38,
+            },
+        )
+
+    def test_from_node(self):
+        element = next(device_elements()).values[0]
+        state = FritzhomeDeviceState.from_node(element)
+
+        assert state.ain == element.attrib["identifier"]
+        assert state.functionsbitmask == int(element.attrib["functionbitmask"])
+
+    def test_functionbitmask_changed(self):
+        plain = Helper.response("base/device_list")
+        self.mock.side_effect = [
+            plain,
+            plain.replace('functionbitmask="896"', 'functionbitmask="768"'),
+        ]
+
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("08761 0000434")
+        assert device.has_powermeter
+        assert device.power == 0
+
+        self.fritz.update_devices()
+        assert self.fritz.get_device_by_ain("08761 0000434") is device
+        assert not device.has_powermeter
+        assert device.power is None
+        assert device.device_state.functionsbitmask == 768
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pyfritzhome import Fritzhome
+from pyfritzhome.fritzhomedevice import _SECTION_FIELDS, FritzhomeDevice
+from pyfritzhome.fritzhomelazydevice import FritzhomeLazyDevice
+
+from .helper import Helper
+from .test_fritzhomedevice import device_elements, state
+
+
+def read_all(device):
+    for name in _SECTION_FIELDS:
+        getattr(device, name, None)
+
+
+class TestFritzhomeLazyDevice(object):
+    def setup_method(self):
+        self.mock = MagicMock()
+        self.fritz = Fritzhome("10.0.0.1", "user", "pass", lazy_devices=True)
+        self.fritz._request = self.mock
+        self.fritz._sid = "0000001"
+
+    @pytest.mark.parametrize("element", list(device_elements()))
+    @patch("time.time", return_value=1700000000.0)
+    def test_equivalent(self, time, element):
+        device = FritzhomeLazyDevice(node=element)
+        read_all(device)
+
+        values = state(device)
+        assert values.pop("_pending", {}) == {}
+        assert values == state(FritzhomeDevice(node=element))
+
+    def test_lazy(self):
+        self.mock.side_effect = [Helper.response("thermostat/device_list_battery_ok")]
+
+        with patch.object(
+            FritzhomeLazyDevice,
+            "_update_hkr_from_element",
+            autospec=True,
+            side_effect=FritzhomeDevice._update_hkr_from_element,
+        ) as decode:
+            self.fritz.update_devices()
+            device = self.fritz.get_device_by_ain("11959 0171328")
+            assert isinstance(device, FritzhomeLazyDevice)
+            assert device.name == "Badezimmer"
+            assert not device.battery_low
+            decode.assert_not_called()
+
+            assert device.target_temperature == 18.0
+            assert device.eco_temperature == 18.0
+            decode.assert_called_once()
+
+    def test_decoded_after_update(self):
+        self.mock.side_effect = [
+            Helper.response("switch/device_list"),
+            Helper.response("switch/device_list"),
+        ]
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("08761 0000434")
+        power = device.power
+        assert "power" in vars(device)
+
+        self.fritz.update_devices()
+        assert "power" not in vars(device)
+        assert device.power == power
+
+    def test_update_fields(self):
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_low"),
+        ]
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("11959 0171328")
+        assert device.target_temperature == 18.0
+
+        self.fritz.update_devices(fields={"power"})
+        assert "target_temperature" in vars(device)
+        assert device.target_temperature == 18.0
+
+        # the undecoded sections are kept as well
+        self.fritz.update_devices()
+        self.fritz.update_devices(fields={"battery_level"})
+        assert device.battery_level == 10
+        assert device.target_temperature == 18.0
+
+    def test_missing_field(self):
+        self.mock.side_effect = [Helper.response("switch/device_list")]
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("08761 0000434")
+
+        assert device.target_temperature is None
+        with pytest.raises(AttributeError):
+            device.buttons
+
+    def test_subscribe(self):
+        self.mock.side_effect = [
+            Helper.response("thermostat/device_list_battery_ok"),
+            Helper.response("thermostat/device_list_battery_low"),
+        ]
+        callback = MagicMock()
+        self.fritz.subscribe("11959 0171328", "target_temperature", callback)
+        self.fritz.update_devices()
+        device = self.fritz.get_device_by_ain("11959 0171328")
+        assert "target_temperature" in vars(device)
+        assert "power" not in vars(device)
+
+        changes = self.fritz.update_devices()
+        assert changes.get_changes("11959 0171328") == {
+            "battery_level": (80, 10),
+            "battery_low": (False, True),
+        }
+        assert "target_temperature" in vars(device)
+        callback.assert_not_called()
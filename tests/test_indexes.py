@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest.mock import MagicMock
+
+from pyfritzhome.devicetypes.fritzhomedevicefeatures import FritzhomeDeviceFeatures
+from pyfritzhome.indexes import RegistryIndexes
+from pyfritzhome.registry import ChangeSet
+
+
+class Device(object):
+    def __init__(self, name, identifier, members=None):
+        self.name = name
+        self.identifier = identifier
+        self.productname = "FRITZ!DECT 200"
+        self.supported_features = [FritzhomeDeviceFeatures.SWITCH]
+        self.is_group = members is not None
+        self.group_members = members
+
+
+def changes(added=(), updated=(), removed=()):
+    changes = ChangeSet()
+    changes.added.update(added)
+    changes.updated.update(updated)
+    changes.removed.update(removed)
+    return changes
+
+
+class TestRegistryIndexes(object):
+    def setup_method(self):
+        self.indexes = RegistryIndexes()
+        self.devices = {
+            "a": Device("Plug", "1"),
+            "b": Device("Plug", "2"),
+            "grp": Device("Group", "900", ["1", "2", "3"]),
+        }
+        self.indexes.update_devices(self.devices, changes(added=self.devices))
+
+    def test_lookup(self):
+        assert self.indexes.get_by_name("Plug") == {"a", "b"}
+        assert self.indexes.get_by_id("900") == "grp"
+        assert self.indexes.get_by_product("FRITZ!DECT 200") == {"a", "b", "grp"}
+        assert self.indexes.get_by_feature(FritzhomeDeviceFeatures.SWITCH) == {
+            "a",
+            "b",
+            "grp",
+        }
+        assert self.indexes.get_by_feature(FritzhomeDeviceFeatures.ALARM) == set()
+        assert self.indexes.get_group_members("grp") == ["a", "b"]
+        assert self.indexes.get_member_groups("a") == {"grp"}
+
+    def test_update(self):
+        self.devices["a"].name = "Lamp"
+        self.devices["grp"].group_members = ["2"]
+        self.indexes.update_devices(self.devices, changes(updated=self.devices))
+
+        assert self.indexes.get_by_name("Plug") == {"b"}
+        assert self.indexes.get_by_name("Lamp") == {"a"}
+        assert self.indexes.get_group_members("grp") == ["b"]
+        assert self.indexes.get_member_groups("a") == set()
+
+    def test_remove(self):
+        self.indexes.update_devices(self.devices, changes(removed=["a", "grp"]))
+
+        assert self.indexes.get_by_name("Plug") == {"b"}
+        assert self.indexes.get_by_id("1") is None
+        assert self.indexes.get_group_members("grp") == []
+        assert self.indexes.get_member_groups("b") == set()
+
+    def test_templates(self):
+        templates = {"tmp1": MagicMock(devices=["a", "b"])}
+        self.indexes.update_templates(templates, changes(added=templates))
+        assert self.indexes.get_template_devices("tmp1") == ("a", "b")
+        assert self.indexes.get_device_templates("a") == {"tmp1"}
+
+        templates["tmp1"].devices = ["b"]
+        self.indexes.update_templates(templates, changes(updated=templates))
+        assert self.indexes.get_device_templates("a") == set()
+
+        self.indexes.update_templates(templates, changes(removed=templates))
+        assert self.indexes.get_template_devices("tmp1") == ()
+        assert self.indexes.get_device_templates("b") == set()
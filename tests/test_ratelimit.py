@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from threading import Thread
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from pyfritzhome import AsyncFritzhome, Fritzhome
+from pyfritzhome.ratelimit import (
+    KIND_READ,
+    KIND_WRITE,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    AsyncRateLimiter,
+    RateLimiter,
+    TokenBucket,
+)
+
+from .helper import Helper
+
+
+class TestTokenBucket(object):
+    def test_refill(self):
+        clock = [100.0]
+        with patch("time.monotonic", side_effect=lambda: clock[0]):
+            bucket = TokenBucket(rate=2, burst=2)
+            assert bucket.take()
+            assert bucket.take()
+            assert not bucket.take()
+            assert bucket.delay() == 0.5
+
+            clock[0] += 0.5
+            assert bucket.take()
+
+            clock[0] += 10
+            assert bucket.delay() == 0.0
+            assert bucket.take()
+            assert bucket.take()
+            assert not bucket.take()
+
+
+class TestRateLimiter(object):
+    def test_separate_budgets(self):
+        limiter = RateLimiter(read_rate=1, write_rate=1, read_burst=1, write_burst=1)
+        start = time.monotonic()
+        limiter.acquire(KIND_READ)
+        limiter.acquire(KIND_WRITE)
+        assert time.monotonic() - start < 0.5
+
+    def test_priority(self):
+        limiter = RateLimiter(read_rate=5, read_burst=1)
+        limiter.acquire(KIND_READ)
+        order = []
+
+        def acquire(name, priority):
+            limiter.acquire(KIND_READ, priority)
+            order.append(name)
+
+        background = Thread(target=acquire, args=("background", PRIORITY_BACKGROUND))
+        interactive = Thread(target=acquire, args=("interactive", PRIORITY_INTERACTIVE))
+        background.start()
+        time.sleep(0.05)
+        interactive.start()
+        background.join()
+        interactive.join()
+
+        assert order == ["interactive", "background"]
+
+
+class TestAsyncRateLimiter(object):
+    def test_priority(self):
+        limiter = AsyncRateLimiter(read_rate=5, read_burst=1)
+        order = []
+
+        async def acquire(name, priority):
+            await limiter.acquire(KIND_READ, priority)
+            order.append(name)
+
+        async def run():
+            await limiter.acquire(KIND_READ)
+            background = asyncio.create_task(
+                acquire("background", PRIORITY_BACKGROUND)
+            )
+            await asyncio.sleep(0.05)
+            await acquire("interactive", PRIORITY_INTERACTIVE)
+            await background
+
+        start = time.monotonic()
+        asyncio.run(run())
+        assert order == ["interactive", "background"]
+        assert time.monotonic() - start >= 0.35
+
+
+class TestFritzhomeRateLimit(object):
+    def setup_method(self):
+        self.mock = MagicMock()
+        self.limiter = MagicMock()
+        self.fritz = Fritzhome("10.0.0.1", "user", "pass", rate_limiter=self.limiter)
+        self.fritz._request = self.mock
+        self.fritz._sid = "0000001"
+
+    def test_request_kinds(self):
+        self.mock.side_effect = [Helper.response("base/device_list"), "1", "0"]
+
+        self.fritz.update_devices()
+        self.fritz.set_switch_state_on("08761 0000434")
+        self.fritz.get_switch_state("08761 0000434")
+
+        assert self.limiter.acquire.call_args_list == [
+            ((KIND_READ, PRIORITY_BACKGROUND),),
+            ((KIND_WRITE, PRIORITY_INTERACTIVE),),
+            ((KIND_READ, PRIORITY_INTERACTIVE),),
+        ]
+
+    def test_stream_request(self):
+        self.fritz._request_stream = MagicMock(
+            return_value=iter([Helper.response("base/device_list").encode()])
+        )
+
+        self.fritz.update_devices(stream=True)
+        self.limiter.acquire.assert_called_once_with(KIND_READ, PRIORITY_BACKGROUND)
+
+
+class TestAsyncFritzhomeRateLimit(object):
+    def test_request_kinds(self):
+        limiter = MagicMock(spec=AsyncRateLimiter)
+        fritz = AsyncFritzhome("10.0.0.1", "user", "pass", rate_limiter=limiter)
+        fritz._request = AsyncMock(side_effect=["1", "0"])
+        fritz._sid = "0000001"
+
+        asyncio.run(fritz.set_switch_state_on("08761 0000434"))
+        asyncio.run(fritz.get_switch_state("08761 0000434"))
+
+        assert limiter.acquire.await_args_list == [
+            ((KIND_WRITE, PRIORITY_INTERACTIVE),),
+            ((KIND_READ, PRIORITY_INTERACTIVE),),
+        ]
+
+    def test_blocking_limiter(self):
+        with pytest.raises(TypeError):
+            AsyncFritzhome("10.0.0.1", "user", "pass", rate_limiter=RateLimiter())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest.mock import MagicMock, patch
+from xml.etree import ElementTree
+
+from pyfritzhome.registry import AttributeChange, ChangeSet, expire, reconcile
+
+
+def elements(*identifiers):
+    return [
+        ElementTree.Element("device", identifier=identifier)
+        for identifier in identifiers
+    ]
+
+
+class Entity(object):
+    def __init__(self, element):
+        self.ain = element.attrib["identifier"]
+        self.updates = 0
+
+
+def update(entity, element):
+    entity.updates += 1
+    return entity
+
+
+class TestRegistry(object):
+    def test_added_updated(self):
+        entities = {}
+        changes = reconcile(entities, elements("a", "b"), Entity, update)
+        assert changes.added == {"a", "b"}
+
+        changes = reconcile(entities, elements("a", "b", "c"), Entity, update)
+        assert changes.added == {"c"}
+        assert changes.updated == {"a", "b"}
+        assert entities["a"].updates == 1
+        assert entities["c"].updates == 0
+
+    def test_replaced(self):
+        entities = {}
+        reconcile(entities, elements("a"), Entity, update)
+        entity = entities["a"]
+
+        changes = reconcile(
+            entities, elements("a"), Entity, lambda entity, element: Entity(element)
+        )
+        assert changes.updated == {"a"}
+        assert entities["a"] is not entity
+
+    def test_unchanged(self):
+        entities = {}
+        is_unchanged = MagicMock(return_value=True)
+
+        changes = reconcile(
+            entities, elements("a"), Entity, update, is_unchanged=is_unchanged
+        )
+        assert changes.added == {"a"}
+
+        changes = reconcile(
+            entities, elements("a"), Entity, update, is_unchanged=is_unchanged
+        )
+        assert changes.unchanged == {"a"}
+        assert entities["a"].updates == 0
+
+    def test_removed(self):
+        entities = {}
+        tombstones = {}
+        reconcile(entities, elements("a", "b"), Entity, update, tombstones=tombstones)
+
+        changes = reconcile(
+            entities,
+            elements("a"),
+            Entity,
+            update,
+            ignore_removed=False,
+            tombstones=tombstones,
+        )
+        assert changes.removed == {"b"}
+        assert list(entities.keys()) == ["a"]
+        assert tombstones == {}
+
+    @patch("pyfritzhome.registry.time.monotonic")
+    def test_tombstones(self, monotonic):
+        entities = {}
+        tombstones = {}
+        monotonic.return_value = 100.0
+        reconcile(entities, elements("a", "b"), Entity, update, tombstones=tombstones)
+
+        changes = reconcile(
+            entities, elements("a"), Entity, update, tombstones=tombstones
+        )
+        assert changes.missing == {"b"}
+        assert tombstones == {"b": 100.0}
+
+        monotonic.return_value = 130.0
+        reconcile(entities, elements("a"), Entity, update, tombstones=tombstones)
+        assert tombstones == {"b": 100.0}
+        assert expire(entities, tombstones, 60) == set()
+
+        monotonic.return_value = 160.0
+        assert expire(entities, tombstones, 60) == {"b"}
+        assert list(entities.keys()) == ["a"]
+        assert tombstones == {}
+
+    def test_tombstone_cleared(self):
+        entities = {}
+        tombstones = {}
+        reconcile(entities, elements("a", "b"), Entity, update, tombstones=tombstones)
+        reconcile(entities, elements("a"), Entity, update, tombstones=tombstones)
+
+        changes = reconcile(
+            entities, elements("a", "b"), Entity, update, tombstones=tombstones
+        )
+        assert changes.updated == {"a", "b"}
+        assert tombstones == {}
+
+    def test_change_set_update(self):
+        changes = ChangeSet()
+        other = ChangeSet()
+        other.added.add("a")
+        other.missing.add("b")
+
+        changes.update(other)
+        assert changes.added == {"a"}
+        assert changes.missing == {"b"}
+        assert changes.has_changes()
+        assert repr(changes).startswith("ChangeSet(added=1,")
+
+    def test_attribute_changes(self):
+        entities = {}
+        reconcile(entities, elements("a", "b"), Entity, update)
+
+        changes = reconcile(
+            entities,
+            elements("a", "b"),
+            Entity,
+            update,
+            snapshot=lambda entity: {
+                entity.ain: {"updates": entity.updates, "ain": entity.ain}
+            },
+        )
+        assert changes.get_changes("a") == {"updates": (0, 1)}
+        assert changes.get_changes("c") == {}
+        assert sorted(changes.iter_changes()) == [
+            AttributeChange("a", "updates", 0, 1),
+            AttributeChange("b", "updates", 0, 1),
+        ]
+
+    def test_change_set_merge_attributes(self):
+        changes = ChangeSet()
+        changes.attributes = {"a": {"x": (1, 2), "y": (1, 2)}}
+        other = ChangeSet()
+        other.attributes = {"a": {"x": (2, 3), "y": (2, 1)}, "b": {"x": (0, 1)}}
+
+        changes.update(other)
+        assert changes.attributes == {"a": {"x": (1, 3)}, "b": {"x": (0, 1)}}
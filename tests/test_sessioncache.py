@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pyfritzhome import Fritzhome, LoginError
+from pyfritzhome.sessioncache import SessionCache
+
+from .helper import Helper
+
+
+class TestSessionCache(object):
+    def test_set_get_remove(self, tmp_path):
+        cache = SessionCache(str(tmp_path / "sid.json"))
+        assert cache.get_sid("fritz.box", "user") is None
+
+        cache.set_sid("fritz.box", "user", "0000000000000001")
+        cache.set_sid("fritz.box", "other", "0000000000000002")
+        assert cache.get_sid("fritz.box", "user") == "0000000000000001"
+        assert cache.get_sid("fritz.box", "other") == "0000000000000002"
+
+        cache.remove_sid("fritz.box", "user")
+        assert cache.get_sid("fritz.box", "user") is None
+        assert cache.get_sid("fritz.box", "other") == "0000000000000002"
+
+    @pytest.mark.skipif(os.name != "posix", reason="POSIX permissions only")
+    def test_permissions(self, tmp_path):
+        path = tmp_path / "sid.json"
+        cache = SessionCache(str(path))
+        cache.set_sid("fritz.box", "user", "0000000000000001")
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+        os.chmod(path, 0o644)
+        assert cache.get_sid("fritz.box", "user") is None
+
+    def test_pbkdf2_hash(self, tmp_path):
+        cache = SessionCache(str(tmp_path / "sid.json"))
+        cache.set_sid("fritz.box", "user", "0000000000000001")
+        cache.set_pbkdf2_hash("fritz.box", "user", "abcd", 1000, "0102")
+        assert cache.get_pbkdf2_hash("fritz.box", "user", "abcd", 1000) == "0102"
+        assert cache.get_pbkdf2_hash("fritz.box", "user", "abcd", 2000) is None
+
+        cache.remove_pbkdf2_hashes("fritz.box", "user")
+        assert cache.get_pbkdf2_hash("fritz.box", "user", "abcd", 1000) is None
+        assert cache.get_sid("fritz.box", "user") == "0000000000000001"
+
+    def test_invalid_content(self, tmp_path):
+        path = tmp_path / "sid.json"
+        path.write_text("no json")
+        os.chmod(path, 0o600)
+
+        cache = SessionCache(str(path))
+        assert cache.get_sid("fritz.box", "user") is None
+
+
+class TestFritzhomeSessionCache(object):
+    def setup_method(self):
+        self.mock = MagicMock()
+        self.cache = MagicMock()
+        self.fritz = Fritzhome("10.0.0.1", "user", "admin123", sid_cache=self.cache)
+        self.fritz._request = self.mock
+
+    def test_login_cached_sid(self):
+        self.cache.get_sid.return_value = "0000000000000001"
+        self.mock.side_effect = [Helper.response("login_rsp_with_valid_sid")]
+
+        self.fritz.login()
+        assert self.fritz._sid == "0000000000000001"
+        self.mock.assert_called_once_with(
+            "http://10.0.0.1/login_sid.lua?version=2", {"sid": "0000000000000001"}
+        )
+
+    def test_login_cached_sid_expired(self):
+        self.cache.get_sid.return_value = "0000000000000002"
+        self.mock.side_effect = [
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_without_valid_sid"),
+            Helper.response("login_rsp_with_valid_sid"),
+        ]
+
+        self.fritz.login()
+        assert self.fritz._sid == "0000000000000001"
+        self.cache.remove_sid.assert_called_once_with("10.0.0.1", "user")
+        self.cache.set_sid.assert_called_once_with(
+            "10.0.0.1", "user", "0000000000000001"
+        )
+
+    def test_login_pbkdf2_file_cache(self, tmp_path):
+        cache = SessionCache(str(tmp_path / "sid.json"))
+        for _ in range(2):
+            fritz = Fritzhome("10.0.0.1", "user", "admin123", pbkdf2_cache=cache)
+            fritz._request = MagicMock(
+                side_effect=[
+                    Helper.response("login_rsp_without_valid_sid_pbkdf2"),
+                    Helper.response("login_rsp_with_valid_sid_pbkdf2"),
+                ]
+            )
+            with patch.object(Fritzhome, "_pbkdf2", wraps=Fritzhome._pbkdf2) as pbkdf2:
+                fritz.login()
+            assert fritz._sid is not None
+        # the second process only computes the dynamic salt stage
+        assert pbkdf2.call_count == 1
+
+    def test_login_pbkdf2_file_cache_password_changed(self, tmp_path):
+        cache = SessionCache(str(tmp_path / "sid.json"))
+        fritz = Fritzhome("10.0.0.1", "user", "admin123", pbkdf2_cache=cache)
+        challenge = Helper.response("login_rsp_without_valid_sid_pbkdf2")
+        fritz._request = MagicMock(
+            side_effect=[challenge, Helper.response("login_rsp_with_valid_sid_pbkdf2")]
+        )
+        fritz.login()
+
+        fritz = Fritzhome("10.0.0.1", "user", "changed", pbkdf2_cache=cache)
+        fritz._request = MagicMock(
+            side_effect=[
+                challenge,
+                challenge,
+                Helper.response("login_rsp_with_valid_sid_pbkdf2"),
+            ]
+        )
+        with patch.object(Fritzhome, "_pbkdf2", wraps=Fritzhome._pbkdf2) as pbkdf2:
+            fritz.login()
+        assert fritz._sid is not None
+        # the cached static stage is replaced by the one of the new password
+        assert pbkdf2.call_count == 3
+        (first, second) = [
+            call[0][1]["response"] for call in fritz._request.call_args_list[1:]
+        ]
+        assert first != second
+        assert fritz._pbkdf2_hashes == {
+            ("a64b986b521fcbc44d7a9f0adad34b14", 10000): Fritzhome._pbkdf2(
+                b"changed", bytes.fromhex("a64b986b521fcbc44d7a9f0adad34b14"), 10000
+            )
+        }
+
+    def test_login_pbkdf2_computed_hash_not_retried(self):
+        fritz = Fritzhome("10.0.0.1", "user", "admin123")
+        fritz._request = MagicMock(
+            return_value=Helper.response("login_rsp_without_valid_sid_pbkdf2")
+        )
+
+        with pytest.raises(LoginError):
+            fritz.login()
+        assert fritz._request.call_count == 2
+
+    def test_logout(self):
+        self.fritz._sid = "0000000000000001"
+        self.fritz.logout()
+        self.cache.remove_sid.assert_called_once_with("10.0.0.1", "user")
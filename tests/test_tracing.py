@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+from unittest.mock import MagicMock, patch
+
+from pyfritzhome import Fritzhome, tracing
+
+from .helper import Helper
+
+
+class TestTracing(object):
+    def setup_method(self):
+        self.fritz = Fritzhome("10.0.0.1", "user", "pass")
+        self.fritz._request = MagicMock(
+            return_value=Helper.response("base/device_list")
+        )
+        self.fritz._sid = "0000001"
+
+    def teardown_method(self):
+        tracing.disable()
+
+    @patch("pyfritzhome.tracing.ElementTree.tostring")
+    def test_disabled(self, tostring, caplog):
+        caplog.set_level(logging.DEBUG, logger="pyfritzhome")
+
+        self.fritz.update_devices()
+        tostring.assert_not_called()
+        assert "update thermostat device" not in caplog.text
+
+    def test_enabled(self, caplog):
+        caplog.set_level(logging.DEBUG, logger="pyfritzhome")
+        tracing.enable()
+
+        self.fritz.update_devices()
+        assert "Adding new Device 08761 0000434" in caplog.text
+        assert "update thermostat device" in caplog.text
+        assert "<device " not in caplog.text
+
+    def test_capture_xml(self, caplog):
+        caplog.set_level(logging.DEBUG, logger="pyfritzhome")
+        tracing.enable(xml=True)
+
+        self.fritz.update_devices()
+        assert '<device identifier="08761 0000434"' in caplog.text